@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark against the offline MLflow + MinIO stand-in
+
+For each network profile (injected latency + bandwidth) it measures:
+  - train: `python train.py` (fit, log params/metrics, log + register model)
+  - serve cold start: fresh interpreter importing model_api_server, which
+    loads the just-registered model from the tracking server / object store
+  - artifact transfer: S3 upload and download throughput for a few sizes
+
+No docker-compose needed: the stand-in runs in background threads of this
+process and the pipeline scripts are pointed at it through
+MLFLOW_TRACKING_URI / MLFLOW_S3_ENDPOINT_URL.
+
+Usage:
+    python benchmark_pipeline.py
+    python benchmark_pipeline.py --profiles local wan --sizes-mb 1 4
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from local_standin import start_standin
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# name -> (latency_ms, bandwidth_mbps); None means unlimited bandwidth
+NETWORK_PROFILES = {
+    "local": (0.0, None),
+    "lan": (1.0, 1000.0),
+    "wan": (30.0, 100.0),
+}
+
+COLD_START_SNIPPET = """
+import time
+start = time.perf_counter()
+import model_api_server
+elapsed = time.perf_counter() - start
+print("COLD_START", elapsed, model_api_server.model_loader.coefficients is not None)
+"""
+
+
+def _run_script(args, env, cwd):
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, cwd=cwd, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+
+def benchmark_train_and_serve(standin, workdir):
+    """Time train -> register -> serve cold start against the stand-in"""
+    env = {**os.environ, **standin.env(), "PYTHONPATH": str(PROJECT_DIR)}
+
+    train_seconds, result = _run_script([sys.executable, str(PROJECT_DIR / "train.py")], env, workdir)
+    model_path_file = Path(workdir) / "model_path.txt"
+    if result.returncode != 0 or not model_path_file.exists():
+        print(f"❌ Training failed:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+        return train_seconds, None
+
+    # model_path.txt holds "<experiment_id>/<run_id>/artifacts/model"
+    run_id = model_path_file.read_text().split("/")[1]
+    env["MODEL_URI"] = f"runs:/{run_id}/model"
+
+    _, result = _run_script([sys.executable, "-c", COLD_START_SNIPPET], env, workdir)
+    cold_start = None
+    for line in result.stdout.splitlines():
+        if line.startswith("COLD_START"):
+            _, seconds, _ = line.split()
+            cold_start = float(seconds)
+    if cold_start is None or "Using fallback mock model" in result.stdout:
+        print(f"❌ Model server did not load the registered model:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+        return train_seconds, None
+    return train_seconds, cold_start
+
+
+def benchmark_artifact_transfer(standin, sizes_mb, repeats=3):
+    """Return {size_mb: (upload_seconds, download_seconds)} using boto3 against the stand-in"""
+    import boto3
+    from botocore.client import Config
+
+    s3_client = boto3.client(
+        's3',
+        endpoint_url=standin.s3_endpoint_url,
+        aws_access_key_id='minio',
+        aws_secret_access_key='minio123',
+        config=Config(signature_version='s3v4'),
+        region_name='us-east-1'
+    )
+    results = {}
+    for size_mb in sizes_mb:
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+        key = f"benchmark/{size_mb}mb.bin"
+        uploads, downloads = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            s3_client.put_object(Bucket='mlflow-artifacts', Key=key, Body=payload)
+            uploads.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            s3_client.get_object(Bucket='mlflow-artifacts', Key=key)['Body'].read()
+            downloads.append(time.perf_counter() - start)
+        results[size_mb] = (min(uploads), min(downloads))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark (offline)")
+    parser.add_argument("--profiles", nargs="+", default=list(NETWORK_PROFILES), choices=list(NETWORK_PROFILES))
+    parser.add_argument("--sizes-mb", nargs="+", type=float, default=[0.1, 1.0, 4.0])
+    args = parser.parse_args()
+
+    if not (PROJECT_DIR / "data.csv").exists():
+        print("data.csv not found. Please run 'python generate_data.py' first.")
+        return
+
+    print("🏁 End-to-end pipeline benchmark (local MLflow + MinIO stand-in)")
+    for profile in args.profiles:
+        latency_ms, bandwidth_mbps = NETWORK_PROFILES[profile]
+        print(f"\n🌐 Profile '{profile}': latency {latency_ms} ms, "
+              f"bandwidth {bandwidth_mbps or 'unlimited'} Mbit/s")
+
+        standin = start_standin(mlflow_port=0, s3_port=0, latency_ms=latency_ms, bandwidth_mbps=bandwidth_mbps)
+        workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+        try:
+            shutil.copy(PROJECT_DIR / "data.csv", workdir)
+            train_seconds, cold_start = benchmark_train_and_serve(standin, workdir)
+            print(f"   🤖 train + register:   {train_seconds:.2f}s")
+            if cold_start is not None:
+                print(f"   🚀 serve cold start:   {cold_start:.2f}s")
+
+            for size_mb, (upload, download) in benchmark_artifact_transfer(standin, args.sizes_mb).items():
+                print(f"   💾 {size_mb:>5} MB artifact: upload {upload * 1000:8.1f} ms "
+                      f"({size_mb / upload:7.1f} MB/s), download {download * 1000:8.1f} ms "
+                      f"({size_mb / download:7.1f} MB/s)")
+        finally:
+            standin.stop()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,26 @@
-import boto3
-from botocore.client import Config
+from setup_minio_bucket import get_s3_client
 
-# Configure MinIO client
-s3_client = boto3.client(
-    's3',
-    endpoint_url='http://localhost:9002',
-    aws_access_key_id='minio',
-    aws_secret_access_key='minio123',
-    config=Config(signature_version='s3v4'),
-    region_name='us-east-1'
-)
-
-# List objects in the bucket
-try:
-    response = s3_client.list_objects_v2(Bucket='mlflow-artifacts')
+def check_minio_contents(bucket_name='mlflow-artifacts'):
+    """List the objects stored in the MLflow artifacts bucket"""
+    
+    # Configure MinIO client
+    s3_client = get_s3_client()
     
-    if 'Contents' in response:
-        print("Objects in mlflow-artifacts bucket:")
-        for obj in response['Contents']:
-            print(f"  {obj['Key']}")
-    else:
-        print("No objects found in bucket")
+    # List objects in the bucket
+    try:
+        response = s3_client.list_objects_v2(Bucket=bucket_name)
         
-except Exception as e:
-    print(f"Error: {e}")
\ No newline at end of file
+        if 'Contents' in response:
+            print(f"Objects in {bucket_name} bucket:")
+            for obj in response['Contents']:
+                print(f"  {obj['Key']}")
+        else:
+            print("No objects found in bucket")
+        return True
+            
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+if __name__ == "__main__":
+    check_minio_contents()
@@ -11,14 +11,14 @@ def convert_mlflow_model_to_joblib():
     # Configure MinIO client
     s3_client = boto3.client(
         's3',
-        endpoint_url='http://localhost:9002',
+        endpoint_url=os.environ.get('MLFLOW_S3_ENDPOINT_URL', 'http://localhost:9002'),
         aws_access_key_id='minio',
         aws_secret_access_key='minio123',
         config=Config(signature_version='s3v4'),
         region_name='us-east-1'
     )
     
-    model_key = "1/models/m-7dbf8b977c304f6fbc9687d81e7ae6dd/artifacts/model.pkl"
+    model_key = os.environ.get('MODEL_KEY', "1/models/m-7dbf8b977c304f6fbc9687d81e7ae6dd/artifacts/model.pkl")
     
     print("🔄 Downloading model from MinIO...")
     
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Fast JSON codec for the ndarray payloads of /predict and /api/v1.0/predictions
+
+Decoding parses the raw request body with orjson and converts the
+data/ndarray field in one step into a float array of the serving dtype.
+Encoding writes the response straight from the numpy predictions array
+(orjson's numpy serializer), so no per-value Python list is built on the
+way out. Key order and separators match Flask's jsonify.
+
+orjson is an optional dependency: without it both functions use the json
+module exactly as before. Anything the fast path does not accept (invalid
+JSON, NaN literals, unexpected envelope, ragged arrays, non-numeric values)
+returns None so the endpoint falls back to request.get_json() and keeps its
+error behaviour.
+
+Usage:
+    python fast_json.py --benchmark     # codec cost by batch size vs the list-based path
+"""
+
+import json
+import time
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def decode_ndarray(body, seldon=False, dtype=np.float64):
+    """Return the request's input array, or None if the fast path does not apply
+
+    seldon=False accepts {"data": [...]} or {"ndarray": [...]} like /predict,
+    seldon=True accepts {"data": {"ndarray": [...]}} like /api/v1.0/predictions.
+    """
+    if orjson is None:
+        return None
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if seldon:
+        data = payload.get("data")
+        values = data.get("ndarray") if isinstance(data, dict) else None
+    else:
+        values = payload["data"] if "data" in payload else payload.get("ndarray")
+    if not isinstance(values, list):
+        return None
+    try:
+        X = np.array(values)
+    except (ValueError, TypeError):
+        return None
+    # Strings, nulls and nested objects keep the old path (and its error response)
+    if X.dtype.kind not in "biuf":
+        return None
+    return X.astype(dtype, copy=False)
+
+
+def encode_prediction_response(predictions, meta):
+    """Response body for {"data": {"ndarray": predictions}, "meta": meta}, byte-compatible with jsonify"""
+    # float64 keeps the digits clients saw before for float32 kernels too
+    # (contiguous: orjson rejects strided views such as one column of the multi-version scores)
+    predictions = np.ascontiguousarray(predictions, dtype=np.float64)
+    if orjson is not None and np.all(np.isfinite(predictions)):
+        try:
+            return orjson.dumps({"data": {"ndarray": predictions}, "meta": meta},
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS
+                                | orjson.OPT_APPEND_NEWLINE)
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+    return (json.dumps({"data": {"ndarray": predictions.tolist()}, "meta": meta},
+                       separators=(",", ":"), sort_keys=True) + "\n").encode()
+
+
+def benchmark_codec(batch_sizes=(1, 10, 100, 1000, 10000), n_features=3):
+    """Decode + encode time per request: list-based json path vs fast codec"""
+    rng = np.random.default_rng(42)
+    weights = rng.normal(size=n_features)
+    meta = {"model": "LinearRegressionModel", "version": "1"}
+    print(f"⏱️ JSON codec per request (orjson: {'yes' if orjson else 'no'})")
+    print(f"{'batch':>8}{'lists (ms)':>13}{'fast (ms)':>12}{'speedup':>10}")
+    for batch_size in batch_sizes:
+        body = json.dumps({"data": {"ndarray": rng.normal(size=(batch_size, n_features)).tolist()}}).encode()
+        repeats = max(5, 20000 // batch_size)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            X = np.array(json.loads(body)["data"]["ndarray"])
+            payload = {"data": {"ndarray": (X @ weights).tolist()}, "meta": meta}
+            json.dumps(payload, separators=(",", ":"), sort_keys=True)
+        baseline_ms = (time.perf_counter() - start) / repeats * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            X = decode_ndarray(body, seldon=True)
+            if X is None:
+                X = np.array(json.loads(body)["data"]["ndarray"])
+            encode_prediction_response(X @ weights, meta)
+        fast_ms = (time.perf_counter() - start) / repeats * 1000
+        print(f"{batch_size:>8}{baseline_ms:>13.3f}{fast_ms:>12.3f}{baseline_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        benchmark_codec()
+    else:
+        print(__doc__)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Preprocessing folded into the serving weights
+
+train.py can fit a declared preprocessing stage (PREPROCESSING env var,
+e.g. "standard" or "standard,poly2") in front of LinearRegression and logs
+the whole sklearn Pipeline as the model. At load time the server turns that
+Pipeline into a FusedLinearModel:
+
+  - affine steps directly in front of the regressor (StandardScaler,
+    MinMaxScaler, MaxAbsScaler, RobustScaler) are folded into the coefficient
+    vector and intercept, so inference is one `X @ coef + intercept`
+  - remaining steps are precompiled into vectorized array ops
+    (affine -> multiply/add, PolynomialFeatures -> column products,
+    OneHotEncoder -> equality masks) that run before the fused product
+
+Usage:
+    python fused_pipeline.py --check     # parity of fused vs sklearn pipelines
+"""
+
+import warnings
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import (
+    MaxAbsScaler,
+    MinMaxScaler,
+    OneHotEncoder,
+    PolynomialFeatures,
+    RobustScaler,
+    StandardScaler,
+)
+from sklearn.linear_model import LinearRegression
+
+# PREPROCESSING spec name -> factory for the training pipeline step
+PREPROCESSING_STEPS = {
+    "standard": StandardScaler,
+    "minmax": MinMaxScaler,
+    "maxabs": MaxAbsScaler,
+    "robust": RobustScaler,
+    "poly2": lambda: PolynomialFeatures(degree=2, include_bias=False),
+    "poly3": lambda: PolynomialFeatures(degree=3, include_bias=False),
+    "onehot": lambda: OneHotEncoder(handle_unknown="ignore", sparse_output=False),
+}
+
+
+def build_training_pipeline(spec):
+    """Return LinearRegression, or a Pipeline with the declared preprocessing steps in front"""
+    names = [name.strip() for name in (spec or "").split(",") if name.strip()]
+    if not names:
+        return LinearRegression()
+    unknown = [name for name in names if name not in PREPROCESSING_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing steps {unknown}, expected {list(PREPROCESSING_STEPS)}")
+    steps = [(name, PREPROCESSING_STEPS[name]()) for name in names]
+    return Pipeline(steps + [("regressor", LinearRegression())])
+
+
+def affine_parameters(step):
+    """Return (scale, offset) with step.transform(X) == X * scale + offset, or None"""
+    if isinstance(step, StandardScaler):
+        scale = 1.0 / step.scale_ if step.with_std else np.ones(step.n_features_in_)
+        mean = step.mean_ if step.with_mean else np.zeros(step.n_features_in_)
+        return scale, -mean * scale
+    if isinstance(step, MinMaxScaler):
+        if step.clip:
+            return None
+        return step.scale_, step.min_
+    if isinstance(step, MaxAbsScaler):
+        return 1.0 / step.scale_, np.zeros(step.n_features_in_)
+    if isinstance(step, RobustScaler):
+        n = step.n_features_in_
+        scale = 1.0 / step.scale_ if step.with_scaling else np.ones(n)
+        center = step.center_ if step.with_centering else np.zeros(n)
+        return scale, -center * scale
+    return None
+
+
+def as_float(X):
+    """X as a float array, keeping float32/float64 inputs as they are (integers become float64)"""
+    X = np.asarray(X)
+    return X.astype(np.result_type(X, np.float32), copy=False)
+
+
+class AffineOp:
+    """X * scale + offset"""
+    def __init__(self, scale, offset):
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+
+    def then(self, other):
+        """Compose with a following affine op into one"""
+        return AffineOp(self.scale * other.scale, self.offset * other.scale + other.offset)
+
+    def __call__(self, X):
+        X = as_float(X)
+        out = X * self.scale.astype(X.dtype, copy=False)
+        out += self.offset.astype(X.dtype, copy=False)
+        return out
+
+    def key(self):
+        return ("affine", self.scale.tobytes(), self.offset.tobytes())
+
+
+class PolynomialOp:
+    """PolynomialFeatures as per-(feature, exponent) column products"""
+    def __init__(self, powers):
+        self.powers = np.asarray(powers, dtype=np.int64)
+        # (feature j, exponent e, output columns using x_j ** e)
+        self.factors = []
+        for j in range(self.powers.shape[1]):
+            for e in np.unique(self.powers[:, j]):
+                if e > 0:
+                    self.factors.append((j, int(e), np.flatnonzero(self.powers[:, j] == e)))
+
+    def __call__(self, X):
+        out = np.ones((X.shape[0], self.powers.shape[0]), dtype=X.dtype)
+        for j, e, columns in self.factors:
+            column = X[:, j] if e == 1 else X[:, j] ** e
+            out[:, columns] *= column[:, None]
+        return out
+
+    def key(self):
+        return ("poly", self.powers.tobytes(), self.powers.shape)
+
+
+class OneHotOp:
+    """OneHotEncoder (dense, no drop) as equality masks; unknown categories encode as zeros"""
+    def __init__(self, categories):
+        self.categories = [np.asarray(c, dtype=np.float64) for c in categories]
+
+    def __call__(self, X):
+        return np.concatenate([(X[:, j, None] == cats[None, :]).astype(X.dtype)
+                               for j, cats in enumerate(self.categories)], axis=1)
+
+    def key(self):
+        return ("onehot",) + tuple(c.tobytes() for c in self.categories)
+
+
+def compile_step(step):
+    """Compile a fitted transformer into a vectorized op"""
+    params = affine_parameters(step)
+    if params is not None:
+        return AffineOp(*params)
+    if isinstance(step, PolynomialFeatures):
+        return PolynomialOp(step.powers_)
+    if isinstance(step, OneHotEncoder):
+        if step.drop is not None:
+            raise ValueError("OneHotEncoder with drop= is not supported by the fused kernel")
+        if step.handle_unknown != "ignore":
+            # The equality masks encode unknown categories as zeros instead of raising
+            raise ValueError(f"OneHotEncoder with handle_unknown='{step.handle_unknown}' "
+                             "is not supported by the fused kernel")
+        # infrequent_categories_ itself raises when grouping was never enabled
+        infrequent = getattr(step, "infrequent_categories_", None)
+        if infrequent is not None and any(c is not None for c in infrequent):
+            raise ValueError("OneHotEncoder with infrequent categories is not supported by the fused kernel")
+        return OneHotOp(step.categories_)
+    raise ValueError(f"Cannot compile preprocessing step {type(step).__name__}")
+
+
+class FeatureMap:
+    """Sequence of compiled non-foldable preprocessing ops"""
+    def __init__(self, ops):
+        merged = []
+        for op in ops:
+            if merged and isinstance(op, AffineOp) and isinstance(merged[-1], AffineOp):
+                merged[-1] = merged[-1].then(op)
+            else:
+                merged.append(op)
+        self.ops = merged
+
+    def __call__(self, X):
+        for op in self.ops:
+            X = op(X)
+        return X
+
+    def key(self):
+        return tuple(op.key() for op in self.ops)
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureMap) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+
+class FusedLinearModel:
+    """Preprocessing + linear regressor compiled to feature_map(X) @ coef_ + intercept_"""
+    def __init__(self, coef, intercept, feature_map=None, n_features_in=None, source=None):
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.feature_map = feature_map if feature_map is not None and feature_map.ops else None
+        self.n_features_in_ = n_features_in or self.coef_.shape[0]
+        self.source = source
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Fold trailing affine steps into the regressor and compile the rest"""
+        *transformers, (_, regressor) = pipeline.steps
+        coef = np.asarray(regressor.coef_, dtype=np.float64)
+        if coef.ndim != 1:
+            raise ValueError("Only single-target linear regressors can be fused")
+        intercept = float(np.asarray(regressor.intercept_))
+
+        steps = [step for _, step in transformers if step not in (None, "passthrough")]
+        while steps:
+            params = affine_parameters(steps[-1])
+            if params is None:
+                break
+            scale, offset = params
+            # coef . (x * scale + offset) + b == (coef * scale) . x + (coef . offset + b)
+            intercept += float(coef @ offset)
+            coef = coef * scale
+            steps.pop()
+
+        feature_map = FeatureMap([compile_step(step) for step in steps])
+        return cls(coef, intercept, feature_map, pipeline.n_features_in_, source=pipeline)
+
+    def transform(self, X):
+        X = as_float(X)
+        return X if self.feature_map is None else self.feature_map(X)
+
+    def predict(self, X):
+        X = self.transform(X)
+        return X @ self.coef_.astype(X.dtype, copy=False) + self.intercept_
+
+
+def check_parity(pipeline, X, tolerance=1e-9, fused=None):
+    """Max abs difference between the fused model and sklearn's own pipeline.predict"""
+    if fused is None:
+        fused = FusedLinearModel.from_pipeline(pipeline)
+    with warnings.catch_warnings():
+        # Pipelines fitted on DataFrames warn about plain arrays; serving uses arrays too
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected = pipeline.predict(X)
+    actual = fused.predict(np.asarray(X, dtype=np.float64))
+    max_abs_error = float(np.max(np.abs(actual - expected)))
+    return max_abs_error <= tolerance * max(1.0, float(np.max(np.abs(expected)))), max_abs_error
+
+
+def run_parity_checks():
+    """Fit a range of pipelines and verify fused predictions match sklearn"""
+    rng = np.random.default_rng(42)
+    X = rng.normal(loc=[0.0, 5.0, -3.0], scale=[1.0, 10.0, 0.1], size=(500, 3))
+    y = X @ np.array([2.0, 3.0, -1.5]) + 0.5 * X[:, 0] * X[:, 1] + rng.normal(size=500) * 0.1
+    X_categorical = rng.integers(0, 4, size=(500, 2)).astype(np.float64)
+    y_categorical = X_categorical @ np.array([1.0, -2.0]) + rng.normal(size=500) * 0.1
+    X_unknown = np.array([[9.0, 1.0], [2.0, -1.0]])
+
+    cases = [
+        ("standard", X, y),
+        ("minmax", X, y),
+        ("maxabs", X, y),
+        ("robust", X, y),
+        ("standard,minmax", X, y),
+        ("poly2", X, y),
+        ("standard,poly2", X, y),
+        ("poly3,standard", X, y),
+        ("minmax,poly2,standard", X, y),
+        ("onehot", X_categorical, y_categorical),
+        ("onehot,standard", X_categorical, y_categorical),
+    ]
+    all_ok = True
+    for spec, X_fit, y_fit in cases:
+        pipeline = build_training_pipeline(spec).fit(X_fit, y_fit)
+        X_eval = np.vstack([X_fit[:100], X_unknown]) if "onehot" in spec else X_fit[:100] * 1.5
+        fused = FusedLinearModel.from_pipeline(pipeline)
+        ok, max_abs_error = check_parity(pipeline, X_eval, fused=fused)
+        n_ops = len(fused.feature_map.ops) if fused.feature_map else 0
+        print(f"{'✅' if ok else '❌'} {spec:<24} max abs error {max_abs_error:.2e}, pre-ops: {n_ops}")
+        all_ok &= ok
+
+    # Encoders the fused kernel cannot reproduce must be refused, not compiled
+    X_rare = np.vstack([X_categorical, [[7.0, 1.0]]])
+    y_rare = np.append(y_categorical, 0.0)
+    refused = [
+        ("onehot handle_unknown=error", OneHotEncoder(sparse_output=False), X_categorical, y_categorical),
+        ("onehot min_frequency=2", OneHotEncoder(handle_unknown="ignore", sparse_output=False,
+                                                 min_frequency=2), X_rare, y_rare),
+        ("onehot max_categories=3", OneHotEncoder(handle_unknown="ignore", sparse_output=False,
+                                                  max_categories=3), X_rare, y_rare),
+    ]
+    for name, encoder, X_fit, y_fit in refused:
+        pipeline = Pipeline([("onehot", encoder), ("regressor", LinearRegression())]).fit(X_fit, y_fit)
+        try:
+            FusedLinearModel.from_pipeline(pipeline)
+            print(f"❌ {name:<28} compiled, but the fused model cannot match sklearn")
+            all_ok = False
+        except ValueError as e:
+            print(f"✅ {name:<28} refused ({e})")
+    return all_ok
+
+
+if __name__ == "__main__":
+    import sys
+    if "--check" in sys.argv:
+        sys.exit(0 if run_parity_checks() else 1)
+    print(__doc__)
@@ -29,6 +29,7 @@ def generate_sample_data():
     print(f"🎯 True coefficients: {true_coefficients}")
     print("\nFirst 5 rows:")
     print(df.head())
+    return True
 
 if __name__ == "__main__":
     generate_sample_data()
\ No newline at end of file
@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the MLflow tracking server and MinIO
+
+Implements the subset of the MLflow REST API (tracking + model registry) and
+the S3 API that train.py, model_api_server.py, convert_model.py and
+setup_minio_bucket.py use, backed by in-memory dicts. Every request can be
+slowed down by a fixed latency (applied once per request, whatever the
+method) and a bandwidth cap (applied to the bytes sent in each direction) so
+end-to-end benchmarks can model a remote tracking server / object store on
+an isolated machine.
+
+Not implemented: authentication (signatures are ignored), S3 multipart
+uploads (MLflow only uses them above 8 MB), ranged GETs, and run search
+filters.
+
+Usage:
+    python local_standin.py                                   # ports 5001 + 9002
+    python local_standin.py --latency-ms 20 --bandwidth-mbps 100
+
+    MLFLOW_TRACKING_URI=http://localhost:5001 \\
+    MLFLOW_S3_ENDPOINT_URL=http://localhost:9002 python train.py
+
+In-process:
+    standin = start_standin(mlflow_port=0, s3_port=0, latency_ms=5)
+    os.environ.update(standin.env())
+    ...
+    standin.stop()
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.sax.saxutils import escape
+
+MLFLOW_API_PREFIXES = ("/api/2.0/mlflow/", "/ajax-api/2.0/mlflow/")
+S3_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+DEFAULT_ARTIFACT_ROOT = "s3://mlflow-artifacts"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _iso(ms):
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(ms / 1000))
+
+
+class MlflowError(Exception):
+    """MLflow REST error, serialized as {"error_code", "message"}"""
+    STATUS = {"RESOURCE_DOES_NOT_EXIST": 404, "RESOURCE_ALREADY_EXISTS": 400,
+              "INVALID_PARAMETER_VALUE": 400, "ENDPOINT_NOT_FOUND": 404}
+
+    def __init__(self, error_code, message):
+        super().__init__(message)
+        self.error_code = error_code
+        self.status = self.STATUS.get(error_code, 500)
+
+
+class StandinState:
+    """In-memory tracking store, model registry and object store"""
+    def __init__(self, artifact_root=DEFAULT_ARTIFACT_ROOT):
+        self.lock = threading.RLock()
+        self.artifact_root = artifact_root.rstrip("/")
+        self.experiments = {}
+        self.runs = {}
+        self.registered_models = {}
+        self.model_versions = {}
+        self.logged_models = {}
+        self.buckets = {}
+        self._next_experiment_id = 0
+        self._create_experiment("Default")
+
+    # ---- tracking ----
+
+    def _create_experiment(self, name, artifact_location=None, tags=None):
+        experiment_id = str(self._next_experiment_id)
+        self._next_experiment_id += 1
+        now = _now_ms()
+        self.experiments[experiment_id] = {
+            "experiment_id": experiment_id,
+            "name": name,
+            "artifact_location": artifact_location or f"{self.artifact_root}/{experiment_id}",
+            "lifecycle_stage": "active",
+            "creation_time": now,
+            "last_update_time": now,
+            "tags": list(tags or []),
+        }
+        return experiment_id
+
+    def get_experiment(self, experiment_id):
+        if experiment_id not in self.experiments:
+            raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"No Experiment with id={experiment_id} exists")
+        return self.experiments[experiment_id]
+
+    def get_experiment_by_name(self, name):
+        for experiment in self.experiments.values():
+            if experiment["name"] == name:
+                return experiment
+        raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"Could not find experiment with name '{name}'")
+
+    def create_experiment(self, body):
+        name = body.get("name")
+        if not name:
+            raise MlflowError("INVALID_PARAMETER_VALUE", "Experiment name must not be empty")
+        if any(e["name"] == name for e in self.experiments.values()):
+            raise MlflowError("RESOURCE_ALREADY_EXISTS", f"Experiment '{name}' already exists.")
+        return self._create_experiment(name, body.get("artifact_location"), body.get("tags"))
+
+    def create_run(self, body):
+        experiment = self.get_experiment(str(body.get("experiment_id", "0")))
+        run_id = uuid.uuid4().hex
+        tags = list(body.get("tags", []))
+        run_name = body.get("run_name") or next(
+            (t["value"] for t in tags if t["key"] == "mlflow.runName"), f"run-{run_id[:8]}")
+        run = {
+            "info": {
+                "run_id": run_id,
+                "run_uuid": run_id,
+                "run_name": run_name,
+                "experiment_id": experiment["experiment_id"],
+                "user_id": body.get("user_id", ""),
+                "status": "RUNNING",
+                "start_time": body.get("start_time", _now_ms()),
+                "artifact_uri": f"{experiment['artifact_location']}/{run_id}/artifacts",
+                "lifecycle_stage": "active",
+            },
+            "data": {"metrics": [], "params": [], "tags": tags},
+            "inputs": {},
+            "_metric_history": [],
+        }
+        self.runs[run_id] = run
+        return run
+
+    def get_run(self, run_id):
+        if run_id not in self.runs:
+            raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"Run '{run_id}' not found")
+        return self.runs[run_id]
+
+    def update_run(self, body):
+        run = self.get_run(body.get("run_id") or body.get("run_uuid"))
+        for field in ("status", "end_time", "run_name"):
+            if field in body:
+                run["info"][field] = body[field]
+        return run["info"]
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        run = self.get_run(run_id)
+        data = run["data"]
+        for param in params:
+            existing = next((p for p in data["params"] if p["key"] == param["key"]), None)
+            if existing is not None and existing["value"] != str(param["value"]):
+                raise MlflowError("INVALID_PARAMETER_VALUE",
+                                  f"Changing param values is not allowed. Param with key='{param['key']}' was already logged")
+            if existing is None:
+                data["params"].append({"key": param["key"], "value": str(param["value"])})
+        for tag in tags:
+            data["tags"] = [t for t in data["tags"] if t["key"] != tag["key"]]
+            data["tags"].append({"key": tag["key"], "value": str(tag["value"])})
+        for metric in metrics:
+            metric = {"key": metric["key"], "value": float(metric["value"]),
+                      "timestamp": int(metric.get("timestamp", _now_ms())),
+                      "step": int(metric.get("step", 0))}
+            run["_metric_history"].append(metric)
+            data["metrics"] = [m for m in data["metrics"] if m["key"] != metric["key"]]
+            data["metrics"].append(metric)
+
+    def public_run(self, run):
+        return {k: v for k, v in run.items() if not k.startswith("_")}
+
+    # ---- logged models (MLflow 3) ----
+
+    def create_logged_model(self, body):
+        experiment = self.get_experiment(str(body.get("experiment_id", "0")))
+        model_id = f"m-{uuid.uuid4().hex}"
+        now = _now_ms()
+        model = {
+            "info": {
+                "model_id": model_id,
+                "experiment_id": experiment["experiment_id"],
+                "name": body.get("name", "model"),
+                "artifact_uri": f"{experiment['artifact_location']}/models/{model_id}/artifacts",
+                "creation_timestamp_ms": now,
+                "last_updated_timestamp_ms": now,
+                "model_type": body.get("model_type", ""),
+                "source_run_id": body.get("source_run_id", ""),
+                "status": "LOGGED_MODEL_PENDING",
+                "tags": list(body.get("tags", [])),
+            },
+            "data": {"params": list(body.get("params", [])), "metrics": []},
+        }
+        self.logged_models[model_id] = model
+        return model
+
+    def get_logged_model(self, model_id):
+        if model_id not in self.logged_models:
+            raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"Logged model '{model_id}' not found")
+        return self.logged_models[model_id]
+
+    # ---- model registry ----
+
+    def create_registered_model(self, body):
+        name = body.get("name")
+        if name in self.registered_models:
+            raise MlflowError("RESOURCE_ALREADY_EXISTS", f"Registered Model (name={name}) already exists.")
+        now = _now_ms()
+        self.registered_models[name] = {
+            "name": name,
+            "creation_timestamp": now,
+            "last_updated_timestamp": now,
+            "description": body.get("description", ""),
+            "tags": list(body.get("tags", [])),
+        }
+        self.model_versions[name] = []
+        return self.public_registered_model(name)
+
+    def get_registered_model(self, name):
+        if name not in self.registered_models:
+            raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"Registered Model with name={name} not found")
+        return self.registered_models[name]
+
+    def public_registered_model(self, name):
+        model = dict(self.get_registered_model(name))
+        versions = self.model_versions[name]
+        if versions:
+            model["latest_versions"] = [versions[-1]]
+        return model
+
+    def create_model_version(self, body):
+        name = body.get("name")
+        self.get_registered_model(name)
+        versions = self.model_versions[name]
+        now = _now_ms()
+        version = {
+            "name": name,
+            "version": str(len(versions) + 1),
+            "creation_timestamp": now,
+            "last_updated_timestamp": now,
+            "current_stage": "None",
+            "description": body.get("description", ""),
+            "source": body.get("source", ""),
+            "run_id": body.get("run_id", ""),
+            "run_link": body.get("run_link", ""),
+            "status": "READY",
+            "tags": list(body.get("tags", [])),
+        }
+        if body.get("model_id"):
+            version["model_id"] = body["model_id"]
+        versions.append(version)
+        self.registered_models[name]["last_updated_timestamp"] = now
+        return version
+
+    def get_model_version(self, name, version):
+        self.get_registered_model(name)
+        for model_version in self.model_versions[name]:
+            if model_version["version"] == str(version):
+                return model_version
+        raise MlflowError("RESOURCE_DOES_NOT_EXIST", f"Model Version (name={name}, version={version}) not found")
+
+    # ---- object store ----
+
+    def put_object(self, bucket, key, body, content_type):
+        if bucket not in self.buckets:
+            return False
+        self.buckets[bucket]["objects"][key] = {
+            "body": body,
+            "etag": hashlib.md5(body).hexdigest(),
+            "last_modified": _now_ms(),
+            "content_type": content_type or "binary/octet-stream",
+        }
+        return True
+
+
+def _decode_aws_chunked(body):
+    """Strip aws-chunked framing (chunk sizes, signatures, trailers) from a body"""
+    out = bytearray()
+    pos = 0
+    while pos < len(body):
+        line_end = body.index(b"\r\n", pos)
+        size = int(body[pos:line_end].split(b";")[0], 16)
+        pos = line_end + 2
+        if size == 0:
+            break
+        out += body[pos:pos + size]
+        pos += size + 2
+    return bytes(out)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Routes MLflow REST calls and S3 calls to the shared StandinState"""
+    protocol_version = "HTTP/1.1"
+    server_version = "LocalStandin/1.0"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # requests stall ~40 ms on delayed ACKs and swamp the injected latency
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- transport with injected latency / bandwidth ----
+
+    def _throttle(self, nbytes):
+        """Bandwidth cost of moving nbytes in either direction"""
+        if self.server.bandwidth_mbps and nbytes:
+            time.sleep(nbytes * 8 / (self.server.bandwidth_mbps * 1_000_000))
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            body = bytes(body)
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if ("aws-chunked" in self.headers.get("Content-Encoding", "")
+                or self.headers.get("x-amz-content-sha256", "").startswith("STREAMING-")):
+            body = _decode_aws_chunked(body)
+        self._throttle(len(body))
+        return body
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self._throttle(len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, json.dumps(payload).encode())
+
+    def _dispatch(self):
+        # Round-trip latency, once per request
+        if self.server.latency_ms > 0:
+            time.sleep(self.server.latency_ms / 1000.0)
+        parsed = urlparse(self.path)
+        try:
+            if parsed.path.startswith(MLFLOW_API_PREFIXES):
+                self._handle_mlflow(parsed)
+            elif parsed.path in ("/health", "/minio/health/live", "/minio/health/ready"):
+                self._send(200, b"OK", "text/plain")
+            elif parsed.path == "/" and self.server.role == "mlflow":
+                self._send(200, b"<html><body>MLflow stand-in</body></html>", "text/html")
+            else:
+                self._handle_s3(parsed)
+        except MlflowError as e:
+            self._send_json({"error_code": e.error_code, "message": str(e)}, e.status)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+    # ---- MLflow REST ----
+
+    def _handle_mlflow(self, parsed):
+        endpoint = parsed.path.split("/mlflow/", 1)[1].rstrip("/")
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        raw = self._read_body() if self.command in ("POST", "PATCH", "PUT", "DELETE") else b""
+        body = json.loads(raw) if raw else {}
+        args = {**query, **body}
+        state = self.server.state
+
+        with state.lock:
+            if endpoint == "experiments/get-by-name":
+                payload = {"experiment": state.get_experiment_by_name(args.get("experiment_name"))}
+            elif endpoint == "experiments/get":
+                payload = {"experiment": state.get_experiment(str(args.get("experiment_id")))}
+            elif endpoint == "experiments/create":
+                payload = {"experiment_id": state.create_experiment(args)}
+            elif endpoint in ("experiments/search", "experiments/list"):
+                payload = {"experiments": list(state.experiments.values())}
+            elif endpoint == "runs/create":
+                payload = {"run": state.public_run(state.create_run(args))}
+            elif endpoint == "runs/get":
+                payload = {"run": state.public_run(state.get_run(args.get("run_id") or args.get("run_uuid")))}
+            elif endpoint == "runs/update":
+                payload = {"run_info": state.update_run(args)}
+            elif endpoint == "runs/search":
+                experiment_ids = {str(e) for e in args.get("experiment_ids", [])}
+                payload = {"runs": [state.public_run(r) for r in state.runs.values()
+                                    if not experiment_ids or r["info"]["experiment_id"] in experiment_ids]}
+            elif endpoint == "runs/log-parameter":
+                state.log_batch(args["run_id"], params=[args])
+                payload = {}
+            elif endpoint == "runs/log-metric":
+                state.log_batch(args["run_id"], metrics=[args])
+                payload = {}
+            elif endpoint == "runs/set-tag":
+                state.log_batch(args.get("run_id") or args.get("run_uuid"), tags=[args])
+                payload = {}
+            elif endpoint == "runs/log-batch":
+                state.log_batch(args["run_id"], args.get("metrics", []), args.get("params", []), args.get("tags", []))
+                payload = {}
+            elif endpoint in ("runs/log-model", "runs/log-inputs", "runs/outputs"):
+                state.get_run(args["run_id"])
+                payload = {}
+            elif endpoint == "metrics/get-history":
+                run = state.get_run(args.get("run_id") or args.get("run_uuid"))
+                payload = {"metrics": [m for m in run["_metric_history"] if m["key"] == args.get("metric_key")]}
+            elif endpoint == "logged-models":
+                payload = {"model": state.create_logged_model(args)}
+            elif endpoint == "logged-models/search":
+                payload = {"models": list(state.logged_models.values())}
+            elif endpoint.startswith("logged-models/"):
+                parts = endpoint.split("/")
+                model = state.get_logged_model(parts[1])
+                if len(parts) == 2 and self.command == "PATCH":
+                    model["info"]["status"] = args.get("status", "LOGGED_MODEL_READY")
+                    model["info"]["last_updated_timestamp_ms"] = _now_ms()
+                elif len(parts) == 3 and parts[2] == "tags":
+                    model["info"]["tags"].extend(args.get("tags", []))
+                elif len(parts) == 3 and parts[2] == "params":
+                    model["data"]["params"].extend(args.get("params", []))
+                payload = {"model": model}
+            elif endpoint == "registered-models/create":
+                payload = {"registered_model": state.create_registered_model(args)}
+            elif endpoint == "registered-models/get":
+                payload = {"registered_model": state.public_registered_model(args.get("name"))}
+            elif endpoint in ("registered-models/search", "registered-models/list"):
+                payload = {"registered_models": [state.public_registered_model(n) for n in state.registered_models]}
+            elif endpoint == "registered-models/get-latest-versions":
+                state.get_registered_model(args.get("name"))
+                versions = state.model_versions[args.get("name")]
+                payload = {"model_versions": versions[-1:]}
+            elif endpoint == "model-versions/create":
+                payload = {"model_version": state.create_model_version(args)}
+            elif endpoint == "model-versions/get":
+                payload = {"model_version": state.get_model_version(args.get("name"), args.get("version"))}
+            elif endpoint == "model-versions/get-download-uri":
+                payload = {"artifact_uri": state.get_model_version(args.get("name"), args.get("version"))["source"]}
+            elif endpoint == "model-versions/search":
+                name = args.get("filter", "").split("=")[-1].strip(" '\"")
+                payload = {"model_versions": [v for vs in state.model_versions.values() for v in vs
+                                              if not name or v["name"] == name]}
+            else:
+                raise MlflowError("ENDPOINT_NOT_FOUND", f"Stand-in does not implement {endpoint}")
+
+        self._send_json(payload)
+
+    # ---- S3 ----
+
+    def _s3_error(self, status, code, message):
+        body = (f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code>'
+                f"<Message>{escape(message)}</Message></Error>").encode()
+        self._send(status, body, "application/xml")
+
+    def _handle_s3(self, parsed):
+        bucket, _, key = unquote(parsed.path.lstrip("/")).partition("/")
+        query = {k: v[0] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
+        body = self._read_body() if self.command in ("PUT", "POST") else b""
+        state = self.server.state
+
+        with state.lock:
+            if not bucket:
+                buckets = "".join(
+                    f"<Bucket><Name>{escape(name)}</Name><CreationDate>{_iso(b['created'])}</CreationDate></Bucket>"
+                    for name, b in sorted(state.buckets.items()))
+                xml = (f'<?xml version="1.0" encoding="UTF-8"?><ListAllMyBucketsResult xmlns="{S3_XMLNS}">'
+                       f"<Owner><ID>standin</ID><DisplayName>standin</DisplayName></Owner>"
+                       f"<Buckets>{buckets}</Buckets></ListAllMyBucketsResult>")
+                return self._send(200, xml.encode(), "application/xml")
+
+            if not key:
+                if self.command == "PUT":
+                    if bucket in state.buckets:
+                        return self._s3_error(409, "BucketAlreadyOwnedByYou", f"Bucket {bucket} already exists")
+                    state.buckets[bucket] = {"created": _now_ms(), "objects": {}}
+                    return self._send(200, headers={"Location": f"/{bucket}"})
+                if bucket not in state.buckets:
+                    if self.command == "HEAD":
+                        return self._send(404)
+                    return self._s3_error(404, "NoSuchBucket", "The specified bucket does not exist")
+                if self.command == "HEAD":
+                    return self._send(200)
+                if self.command == "DELETE":
+                    del state.buckets[bucket]
+                    return self._send(204)
+                return self._list_objects(bucket, query)
+
+            if bucket not in state.buckets:
+                if self.command == "HEAD":
+                    return self._send(404)
+                return self._s3_error(404, "NoSuchBucket", "The specified bucket does not exist")
+            objects = state.buckets[bucket]["objects"]
+
+            if self.command == "PUT":
+                state.put_object(bucket, key, body, self.headers.get("Content-Type"))
+                return self._send(200, headers={"ETag": f'"{objects[key]["etag"]}"'})
+            if self.command == "DELETE":
+                objects.pop(key, None)
+                return self._send(204)
+            if key not in objects:
+                if self.command == "HEAD":
+                    return self._send(404)
+                return self._s3_error(404, "NoSuchKey", "The specified key does not exist.")
+            obj = objects[key]
+            headers = {"ETag": f'"{obj["etag"]}"',
+                       "Last-Modified": formatdate(obj["last_modified"] / 1000, usegmt=True),
+                       "Accept-Ranges": "bytes"}
+            if self.command == "HEAD":
+                self.send_response(200)
+                self.send_header("Content-Type", obj["content_type"])
+                self.send_header("Content-Length", str(len(obj["body"])))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+            data = obj["body"]
+        self._send(200, data, obj["content_type"], headers)
+
+    def _list_objects(self, bucket, query):
+        prefix = query.get("prefix", "")
+        delimiter = query.get("delimiter", "")
+        contents, common_prefixes = [], set()
+        for key in sorted(self.server.state.buckets[bucket]["objects"]):
+            if not key.startswith(prefix):
+                continue
+            if delimiter and delimiter in key[len(prefix):]:
+                common_prefixes.add(prefix + key[len(prefix):].split(delimiter, 1)[0] + delimiter)
+                continue
+            contents.append(key)
+
+        objects = self.server.state.buckets[bucket]["objects"]
+        parts = [f'<?xml version="1.0" encoding="UTF-8"?><ListBucketResult xmlns="{S3_XMLNS}">',
+                 f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>",
+                 f"<KeyCount>{len(contents) + len(common_prefixes)}</KeyCount>",
+                 "<MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>"]
+        if delimiter:
+            parts.append(f"<Delimiter>{escape(delimiter)}</Delimiter>")
+        for key in contents:
+            obj = objects[key]
+            parts.append(f"<Contents><Key>{escape(key)}</Key><LastModified>{_iso(obj['last_modified'])}</LastModified>"
+                         f"<ETag>&quot;{obj['etag']}&quot;</ETag><Size>{len(obj['body'])}</Size>"
+                         f"<StorageClass>STANDARD</StorageClass></Contents>")
+        for common_prefix in sorted(common_prefixes):
+            parts.append(f"<CommonPrefixes><Prefix>{escape(common_prefix)}</Prefix></CommonPrefixes>")
+        parts.append("</ListBucketResult>")
+        self._send(200, "".join(parts).encode(), "application/xml")
+
+
+class LocalStandin:
+    """MLflow + S3 stand-in servers sharing one in-memory state"""
+    def __init__(self, mlflow_port=5001, s3_port=9002, host="127.0.0.1",
+                 latency_ms=0.0, bandwidth_mbps=None, buckets=("mlflow-artifacts",), verbose=False):
+        self.state = StandinState()
+        for bucket in buckets:
+            self.state.buckets[bucket] = {"created": _now_ms(), "objects": {}}
+        self.servers = []
+        for role, port in (("mlflow", mlflow_port), ("s3", s3_port)):
+            server = ThreadingHTTPServer((host, port), StandinHandler)
+            server.daemon_threads = True
+            server.role = role
+            server.state = self.state
+            server.latency_ms = latency_ms
+            server.bandwidth_mbps = bandwidth_mbps
+            server.verbose = verbose
+            self.servers.append(server)
+        self.host = host
+        self._threads = []
+
+    @property
+    def tracking_uri(self):
+        return f"http://{self.host}:{self.servers[0].server_address[1]}"
+
+    @property
+    def s3_endpoint_url(self):
+        return f"http://{self.host}:{self.servers[1].server_address[1]}"
+
+    def env(self):
+        """Environment variables that point the pipeline scripts at the stand-in"""
+        return {
+            "MLFLOW_TRACKING_URI": self.tracking_uri,
+            "MLFLOW_S3_ENDPOINT_URL": self.s3_endpoint_url,
+            "AWS_ACCESS_KEY_ID": os.environ.get("AWS_ACCESS_KEY_ID", "minio"),
+            "AWS_SECRET_ACCESS_KEY": os.environ.get("AWS_SECRET_ACCESS_KEY", "minio123"),
+        }
+
+    def set_network(self, latency_ms=None, bandwidth_mbps=None):
+        """Change the injected latency / bandwidth of a running stand-in
+
+        None leaves a setting unchanged; bandwidth_mbps=0 removes the cap.
+        """
+        for server in self.servers:
+            if latency_ms is not None:
+                server.latency_ms = latency_ms
+            if bandwidth_mbps is not None:
+                server.bandwidth_mbps = bandwidth_mbps or None
+
+    def start(self):
+        for server in self.servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+def start_standin(**kwargs):
+    """Start a stand-in in background threads of the current process"""
+    return LocalStandin(**kwargs).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline MLflow + MinIO stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--mlflow-port", type=int, default=5001)
+    parser.add_argument("--s3-port", type=int, default=9002)
+    parser.add_argument("--latency-ms", type=float, default=float(os.environ.get("STANDIN_LATENCY_MS", 0)))
+    parser.add_argument("--bandwidth-mbps", type=float,
+                        default=float(os.environ["STANDIN_BANDWIDTH_MBPS"]) if "STANDIN_BANDWIDTH_MBPS" in os.environ else None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    standin = start_standin(mlflow_port=args.mlflow_port, s3_port=args.s3_port, host=args.host,
+                            latency_ms=args.latency_ms, bandwidth_mbps=args.bandwidth_mbps,
+                            verbose=args.verbose)
+    print("🧪 Local MLflow + MinIO stand-in running")
+    print(f"   📊 MLflow tracking: {standin.tracking_uri}")
+    print(f"   💾 S3 endpoint:     {standin.s3_endpoint_url}")
+    print(f"   ⏱️ Latency: {args.latency_ms} ms, bandwidth: {args.bandwidth_mbps or 'unlimited'} Mbit/s")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping stand-in")
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,19 @@
 """
 Model API Server that loads trained model from MLflow
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import json
 import numpy as np
 import mlflow
 import mlflow.sklearn
 from mlflow.tracking import MlflowClient
+from sklearn.pipeline import Pipeline
+
+from fast_json import decode_ndarray, encode_prediction_response
+from fused_pipeline import FusedLinearModel, check_parity
+from model_versions import ModelVersionSet, SHADOW, CANARY, HOLDOUT_ARTIFACT
+from monitoring import DEFAULT_MIN_ROWS, DriftMonitor, FeatureSketch, REFERENCE_ARTIFACT
+from traffic_capture import TrafficRecorder
 
 app = Flask(__name__)
 
@@ -19,7 +26,12 @@ class MLflowModelLoader:
         self.version = "1"
         self.coefficients = None
         self.intercept = None
+        self.versions = None
+        self.monitor = None
+        self.holdout_sample = None
         self.load_model()
+        self._init_versions()
+        self._init_precision()
 
     def load_model(self):
         """Load the trained model from MLflow"""
@@ -28,21 +40,24 @@ class MLflowModelLoader:
 
             # Set MinIO/S3 environment variables
             import os
-            os.environ['MLFLOW_S3_ENDPOINT_URL'] = 'http://localhost:9002'
-            os.environ['AWS_ENDPOINT_URL'] = 'http://localhost:9002'
+            os.environ.setdefault('MLFLOW_S3_ENDPOINT_URL', 'http://localhost:9002')
+            os.environ['AWS_ENDPOINT_URL'] = os.environ['MLFLOW_S3_ENDPOINT_URL']
             os.environ['AWS_ACCESS_KEY_ID'] = 'minioadmin'
             os.environ['AWS_SECRET_ACCESS_KEY'] = 'minioadmin'
             os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+            mlflow.set_tracking_uri(os.environ.get('MLFLOW_TRACKING_URI', 'http://localhost:5001'))
 
             # Try loading from run artifacts directly
             print("📍 Trying to load from run artifacts...")
             run_id = '860a6755aeef435dbd9eef30c7a195de'  # From earlier output
-            model_uri = f"runs:/{run_id}/model"
+            model_uri = os.environ.get('MODEL_URI', f"runs:/{run_id}/model")
 
             print(f"📍 Model URI: {model_uri}")
 
-            # Load the model
+            # Load the model, folding any logged preprocessing into the weights
             self.model = mlflow.sklearn.load_model(model_uri)
+            self._load_holdout_sample(model_uri)
+            self.model = self._fuse_preprocessing(self.model)
 
             # Extract coefficients and intercept for display
             if hasattr(self.model, 'coef_'):
@@ -54,6 +69,8 @@ class MLflowModelLoader:
             print(f"📊 Coefficients: {self.coefficients}")
             print(f"📊 Intercept: {self.intercept}")
 
+            self._init_monitoring(model_uri)
+
         except Exception as e:
             print(f"❌ Failed to load model from run: {e}")
             print("⚠️ Using fallback mock model...")
@@ -68,25 +85,164 @@ class MLflowModelLoader:
         self.coefficients = self.model.coef_.tolist()
         self.intercept = float(self.model.intercept_)
 
-    def predict(self, X):
-        """Make predictions using loaded model"""
+    def _fuse_preprocessing(self, model):
+        """Fold a preprocessing Pipeline into one linear kernel, keeping it only if it matches sklearn"""
+        if not isinstance(model, Pipeline):
+            return model
+        try:
+            fused = FusedLinearModel.from_pipeline(model)
+            if self.holdout_sample is not None:
+                ok, max_abs_error = check_parity(model, self.holdout_sample, fused=fused)
+                if not ok:
+                    raise ValueError(f"fused output differs from the pipeline by {max_abs_error:.3g}")
+            n_ops = len(fused.feature_map.ops) if fused.feature_map else 0
+            print(f"✅ Preprocessing fused into the weights ({n_ops} precompiled feature ops)")
+            return fused
+        except Exception as e:
+            print(f"⚠️ Could not fuse preprocessing ({e}), serving the sklearn Pipeline")
+            return model
+
+    def _init_monitoring(self, model_uri):
+        """Load the training reference sketch logged next to the model, if any
+
+        DRIFT_MIN_ROWS: live rows needed before features are flagged as drifted
+        """
+        import os
+        if not model_uri.startswith("runs:/"):
+            print("⚠️ Drift monitoring needs a runs:/ model URI, skipping")
+            return
+        try:
+            reference_uri = f"{model_uri.rsplit('/', 1)[0]}/{REFERENCE_ARTIFACT}"
+            reference = FeatureSketch.from_dict(mlflow.artifacts.load_dict(reference_uri))
+            self.monitor = DriftMonitor(reference, min_rows=int(os.environ.get('DRIFT_MIN_ROWS', DEFAULT_MIN_ROWS)))
+            print(f"✅ Drift monitoring enabled ({reference.count} reference rows)")
+        except Exception as e:
+            print(f"⚠️ No reference sketch for drift monitoring: {e}")
+
+    def _load_holdout_sample(self, model_uri):
+        """Load the held-out feature rows logged by train.py for the precision check"""
+        if not model_uri.startswith("runs:/"):
+            return
+        try:
+            holdout_uri = f"{model_uri.rsplit('/', 1)[0]}/{HOLDOUT_ARTIFACT}"
+            self.holdout_sample = np.asarray(mlflow.artifacts.load_dict(holdout_uri)["data"], dtype=np.float64)
+        except Exception as e:
+            print(f"⚠️ No held-out sample for the precision check: {e}")
+
+    def _init_precision(self):
+        """Enable INFERENCE_PRECISION (float64/float32/float16) if it stays within PRECISION_TOLERANCE"""
+        import os
+        mode = os.environ.get('INFERENCE_PRECISION', 'float64')
+        tolerance = float(os.environ.get('PRECISION_TOLERANCE', '1e-3'))
+
+        X_sample = self.holdout_sample
+        if X_sample is None:
+            # No logged held-out rows: draw from the training reference (or unit normal)
+            n_features = len(self.coefficients) if self.coefficients is not None else 3
+            rng = np.random.default_rng(0)
+            mean, std = np.zeros(n_features), np.ones(n_features)
+            if self.monitor is not None:
+                mean, std = self.monitor.reference.mean, np.sqrt(self.monitor.reference.variance)
+            X_sample = rng.normal(mean, std, size=(200, n_features))
+
+        try:
+            self.versions.set_precision(mode, X_sample, tolerance)
+            print(f"✅ Inference precision: {mode}")
+        except ValueError as e:
+            print(f"❌ Refusing precision '{mode}': {e}. Serving in float64.")
+
+        for name, result in self.versions.precision_report.items():
+            if result["rows_per_second"] is None:
+                print(f"   {name:<8} unavailable ({result.get('reason')})")
+                continue
+            status = "ok" if result["accepted"] else "exceeds tolerance"
+            print(f"   {name:<8} max abs error {result['max_abs_error']:.2e} ({status}), "
+                  f"{result['rows_per_second'] / 1e6:.1f}M rows/s")
+
+    def _init_versions(self):
+        """Build the version set: primary plus shadow/canary versions from the environment
+
+        SHADOW_MODEL_URIS: comma-separated model URIs scored on every request but never served
+        CANARY_MODEL_URI / CANARY_TRAFFIC_PERCENT: model URI served for that share of requests
+        SHADOW_LOG_PATH: optional JSONL file receiving per-request comparisons
+        """
+        import os
+        self.versions = ModelVersionSet(self.version, self.model,
+                                        comparison_log_path=os.environ.get('SHADOW_LOG_PATH'))
+        for model_uri in filter(None, os.environ.get('SHADOW_MODEL_URIS', '').split(',')):
+            self.add_version(model_uri.strip(), SHADOW)
+        if os.environ.get('CANARY_MODEL_URI'):
+            self.add_version(os.environ['CANARY_MODEL_URI'], CANARY,
+                             float(os.environ.get('CANARY_TRAFFIC_PERCENT', '10')))
+
+    def add_version(self, model_uri, role=SHADOW, traffic_percent=0.0, name=None):
+        """Load another model version from MLflow and score it next to the primary"""
+        try:
+            print(f"🔄 Loading {role} version from {model_uri}...")
+            model = self._fuse_preprocessing(mlflow.sklearn.load_model(model_uri))
+            self.versions.add_version(name or model_uri, model, role, traffic_percent)
+            print(f"✅ {role.capitalize()} version loaded (fused scoring: {self.versions.fused})")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to load {role} version {model_uri}: {e}")
+            return False
+
+    def predict_array(self, X):
+        """Make predictions, returning (predictions array, name of the version that served them)"""
         if self.model is None:
-            return [0.0]
+            return np.zeros(1), self.version
 
-        # Convert input to numpy array
-        if isinstance(X, list):
-            X = np.array(X)
+        # Convert input to numpy array in the kernel's precision; non-numeric
+        # input is left for ModelVersionSet.predict to reject like sklearn did
+        X = np.asarray(X)
+        if X.dtype.kind in "biuf":
+            X = X.astype(self.versions.input_dtype, copy=False)
 
         # Handle single sample vs batch
         if X.ndim == 1:
             X = X.reshape(1, -1)
 
-        predictions = self.model.predict(X)
-        return predictions.tolist()
+        predictions, served_version = self.versions.predict(X)
+        if self.monitor is not None:
+            self.monitor.observe(X)
+        return predictions, served_version
+
+    def predict_with_version(self, X):
+        """Make predictions, returning (predictions list, name of the version that served them)"""
+        predictions, served_version = self.predict_array(X)
+        return predictions.tolist(), served_version
+
+    def predict(self, X):
+        """Make predictions using loaded model"""
+        return self.predict_with_version(X)[0]
 
 # Initialize model loader
 model_loader = MLflowModelLoader()
 
+# Opt-in request capture for replay_traffic.py (set TRAFFIC_CAPTURE_DIR)
+traffic_recorder = TrafficRecorder.from_env()
+CAPTURED_PATHS = ('/predict', '/api/v1.0/predictions')
+
+@app.before_request
+def capture_traffic():
+    """Hand sampled prediction requests to the capture writer thread"""
+    if traffic_recorder is not None and request.method == 'POST' and request.path in CAPTURED_PATHS:
+        traffic_recorder.record(request.path, request.get_data())
+
+def _fast_input(seldon):
+    """Request input decoded straight into the kernel dtype, or None to use request.get_json()"""
+    if not request.is_json:
+        return None
+    return decode_ndarray(request.get_data(), seldon=seldon, dtype=model_loader.versions.input_dtype)
+
+def _prediction_response(predictions, served_version):
+    """Seldon-format prediction response written from the numpy predictions"""
+    body = encode_prediction_response(predictions, {
+        "model": model_loader.model_name,
+        "version": served_version
+    })
+    return Response(body, mimetype="application/json")
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -103,28 +259,22 @@ def health():
 def predict():
     """Prediction endpoint compatible with Seldon format"""
     try:
-        data = request.get_json()
-        
-        # Handle both Seldon format and simple format
-        if 'data' in data:
-            input_data = data['data']
-        elif 'ndarray' in data:
-            input_data = data['ndarray']
-        else:
-            return jsonify({"error": "Missing 'data' or 'ndarray' field"}), 400
+        input_data = _fast_input(seldon=False)
+        if input_data is None:
+            data = request.get_json()
             
-        predictions = model_loader.predict(input_data)
+            # Handle both Seldon format and simple format
+            if 'data' in data:
+                input_data = data['data']
+            elif 'ndarray' in data:
+                input_data = data['ndarray']
+            else:
+                return jsonify({"error": "Missing 'data' or 'ndarray' field"}), 400
+            
+        predictions, served_version = model_loader.predict_array(input_data)
         
         # Return in Seldon-compatible format
-        return jsonify({
-            "data": {
-                "ndarray": predictions
-            },
-            "meta": {
-                "model": model_loader.model_name,
-                "version": model_loader.version
-            }
-        })
+        return _prediction_response(predictions, served_version)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -133,25 +283,19 @@ def predict():
 def seldon_predict():
     """Seldon-compatible prediction endpoint"""
     try:
-        data = request.get_json()
-        
-        # Seldon format: {"data": {"ndarray": [[1,2,3]]}}
-        if 'data' in data and 'ndarray' in data['data']:
-            input_data = data['data']['ndarray']
-        else:
-            return jsonify({"error": "Expected Seldon format: {'data': {'ndarray': [[...]]}}"}), 400
+        input_data = _fast_input(seldon=True)
+        if input_data is None:
+            data = request.get_json()
+            
+            # Seldon format: {"data": {"ndarray": [[1,2,3]]}}
+            if 'data' in data and 'ndarray' in data['data']:
+                input_data = data['data']['ndarray']
+            else:
+                return jsonify({"error": "Expected Seldon format: {'data': {'ndarray': [[...]]}}"}), 400
             
-        predictions = model_loader.predict(input_data)
+        predictions, served_version = model_loader.predict_array(input_data)
         
-        return jsonify({
-            "data": {
-                "ndarray": predictions
-            },
-            "meta": {
-                "model": model_loader.model_name,
-                "version": model_loader.version
-            }
-        })
+        return _prediction_response(predictions, served_version)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -159,14 +303,28 @@ def seldon_predict():
 @app.route('/api/v1.0/metadata', methods=['GET'])
 def metadata():
     """Model metadata endpoint"""
+    datatype = "FP64" if model_loader.versions.precision == "float64" else "FP32"
     return jsonify({
         "name": model_loader.model_name,
         "versions": [model_loader.version],
         "platform": "sklearn",
-        "inputs": [{"name": "features", "datatype": "FP32", "shape": ["-1", "3"]}],
-        "outputs": [{"name": "predictions", "datatype": "FP32", "shape": ["-1", "1"]}]
+        "precision": model_loader.versions.precision,
+        "inputs": [{"name": "features", "datatype": datatype, "shape": ["-1", "3"]}],
+        "outputs": [{"name": "predictions", "datatype": datatype, "shape": ["-1", "1"]}]
     })
 
+@app.route('/versions', methods=['GET'])
+def versions():
+    """Primary/shadow/canary versions with kernel latency and per-version disagreement stats"""
+    return jsonify(model_loader.versions.report())
+
+@app.route('/monitoring', methods=['GET'])
+def monitoring():
+    """Live input feature statistics and drift scores against the training data"""
+    if model_loader.monitor is None:
+        return jsonify({"error": "Drift monitoring not available (no reference sketch loaded)"}), 404
+    return jsonify(model_loader.monitor.report())
+
 @app.route('/', methods=['GET'])
 def root():
     """API documentation"""
@@ -177,7 +335,9 @@ def root():
             "GET /health": "Health check",
             "POST /predict": "Make predictions (simple format)",
             "POST /api/v1.0/predictions": "Make predictions (Seldon format)",
-            "GET /api/v1.0/metadata": "Model metadata"
+            "GET /api/v1.0/metadata": "Model metadata",
+            "GET /versions": "Shadow/canary version stats",
+            "GET /monitoring": "Input drift scores vs training data"
         },
         "curl_examples": {
             "health": "curl -X GET http://localhost:8080/health",
@@ -196,6 +356,8 @@ if __name__ == '__main__':
     print("   POST /predict - Simple predictions")
     print("   POST /api/v1.0/predictions - Seldon format predictions")
     print("   GET  /api/v1.0/metadata - Model metadata")
+    print("   GET  /versions - Shadow/canary version stats")
+    print("   GET  /monitoring - Input drift scores vs training data")
     print()
 
     app.run(host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
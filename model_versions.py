@@ -0,0 +1,356 @@
+"""
+Multi-version inference for shadow and canary traffic
+
+A ModelVersionSet holds the primary model plus any number of shadow and
+canary versions. When every version is a linear regressor, their weights are
+stacked into one (n_features, n_versions) matrix so a batch is scored by all
+versions with a single `X @ W + b`. Otherwise each version's predict() is
+called in turn.
+
+Each request is served by the primary or, with the configured traffic
+percentage, by a canary. Shadow versions are scored but never served.
+Comparison against the primary (disagreement, latency, optional JSONL log)
+happens on a background thread fed by a bounded queue, so it stays off the
+response path; when the queue is full the comparison is dropped and counted.
+Latency is timed per version only when versions are scored separately; a
+fused call is timed once and reported as the kernel latency.
+
+The fused kernel can run in reduced precision (see PRECISION_MODES). A mode
+is only enabled after check_precision() has compared it against the float64
+output on a held-out sample and found the error within tolerance.
+"""
+
+import json
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from fused_pipeline import FusedLinearModel
+
+PRIMARY = "primary"
+SHADOW = "shadow"
+CANARY = "canary"
+
+HOLDOUT_ARTIFACT = "validation/holdout_sample.json"
+
+# precision mode -> (weight storage dtype, input/accumulation dtype)
+PRECISION_MODES = {
+    "float64": (np.float64, np.float64),
+    "float32": (np.float32, np.float32),
+    "float16": (np.float16, np.float32),
+}
+
+
+def linear_parameters(model):
+    """Return (coef, intercept, feature_map) for a linear regressor or FusedLinearModel, else None
+
+    feature_map is None when the model is linear in the raw request features.
+    """
+    if isinstance(model, FusedLinearModel):
+        return model.coef_, model.intercept_, model.feature_map
+    if not type(model).__module__.startswith("sklearn.linear_model"):
+        return None
+    if hasattr(model, "predict_proba") or not hasattr(model, "coef_"):
+        return None
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    if coef.ndim != 1:
+        return None
+    return coef, float(np.asarray(getattr(model, "intercept_", 0.0))), None
+
+
+class VersionStats:
+    """Running per-version serving and comparison statistics"""
+    def __init__(self):
+        self.requests_served = 0
+        self.batches_scored = 0
+        self.rows_scored = 0
+        self.batches_timed = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self.rows_compared = 0
+        self.rows_disagreeing = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+
+    def to_dict(self):
+        return {
+            "requests_served": self.requests_served,
+            "batches_scored": self.batches_scored,
+            "rows_scored": self.rows_scored,
+            "mean_latency_ms": 1000 * self.latency_seconds / self.batches_timed if self.batches_timed else None,
+            "max_latency_ms": 1000 * self.max_latency_seconds if self.batches_timed else None,
+            "rows_compared": self.rows_compared,
+            "disagreement_rate": self.rows_disagreeing / self.rows_compared if self.rows_compared else None,
+            "mean_abs_diff": self.abs_diff_sum / self.rows_compared if self.rows_compared else None,
+            "max_abs_diff": self.max_abs_diff,
+        }
+
+
+class ModelVersionSet:
+    """Primary model plus shadow/canary versions, scored together"""
+    def __init__(self, primary_name, primary_model, disagreement_tolerance=1e-6,
+                 comparison_log_path=None, queue_size=1000, seed=None):
+        self.names = [primary_name]
+        self.models = [primary_model]
+        self.roles = [PRIMARY]
+        self.traffic_percents = [0.0]
+        self.disagreement_tolerance = disagreement_tolerance
+        self.comparison_log_path = comparison_log_path
+        self.stats = {primary_name: VersionStats()}
+        self.kernel_stats = VersionStats()
+        self.comparisons_dropped = 0
+        self.weights = None
+        self.intercepts = None
+        self.feature_map = None
+        self.precision = "float64"
+        self.precision_report = {}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._comparison_loop, daemon=True)
+        self._worker.start()
+        self._rebuild()
+
+    @property
+    def fused(self):
+        """True when all versions are scored by one stacked matrix product"""
+        return self.weights is not None
+
+    def add_version(self, name, model, role=SHADOW, traffic_percent=0.0):
+        """Register a shadow or canary version next to the primary"""
+        if role not in (SHADOW, CANARY):
+            raise ValueError(f"role must be '{SHADOW}' or '{CANARY}', got '{role}'")
+        if name in self.stats:
+            raise ValueError(f"Version '{name}' is already registered")
+        if role == CANARY and sum(self.traffic_percents) + traffic_percent > 100:
+            raise ValueError("Canary traffic percentages add up to more than 100")
+        with self._lock:
+            # Copy-on-write so in-flight requests keep a consistent snapshot
+            self.stats[name] = VersionStats()
+            self.names = self.names + [name]
+            self.models = self.models + [model]
+            self.roles = self.roles + [role]
+            self.traffic_percents = self.traffic_percents + [float(traffic_percent) if role == CANARY else 0.0]
+            self._rebuild()
+
+    def _rebuild(self):
+        """Stack linear weights into (n_features, n_versions) when every version is linear
+
+        Versions with a precompiled preprocessing feature map can only be
+        stacked when they all share the same map; it then runs once per batch.
+        """
+        params = [linear_parameters(model) for model in self.models]
+        if (all(p is not None for p in params) and len({p[0].shape for p in params}) == 1
+                and all(p[2] == params[0][2] for p in params)):
+            self.weights = np.ascontiguousarray(np.column_stack([p[0] for p in params]))
+            self.intercepts = np.array([p[1] for p in params])
+            self.feature_map = params[0][2]
+        else:
+            self.weights = None
+            self.intercepts = None
+            self.feature_map = None
+        # Changing the version set invalidates any earlier precision check
+        self.precision = "float64"
+        self.precision_report = {}
+        self._active = self._snapshot(self.precision)
+
+    def _snapshot(self, precision):
+        """(names, models, weights, intercepts, traffic, input dtype, feature map) cast for a precision mode"""
+        storage_dtype, compute_dtype = PRECISION_MODES[precision]
+        weights, intercepts = self.weights, self.intercepts
+        if weights is not None:
+            # float16 storage is rounded, then widened so products accumulate in float32
+            weights = np.ascontiguousarray(weights.astype(storage_dtype).astype(compute_dtype))
+            intercepts = intercepts.astype(compute_dtype)
+        return (self.names, self.models, weights, intercepts, self.traffic_percents, compute_dtype,
+                self.feature_map)
+
+    @property
+    def input_dtype(self):
+        """dtype requests should be decoded into for the active precision"""
+        return self._active[5]
+
+    def check_precision(self, X_sample, tolerance, modes=None, throughput_rows=100_000):
+        """Compare each precision mode with float64 on X_sample and measure its throughput
+
+        Returns {mode: {"max_abs_error", "accepted", "rows_per_second"}}.
+        """
+        modes = modes or list(PRECISION_MODES)
+        X_sample = np.asarray(X_sample, dtype=np.float64)
+        reference, _ = self.score_all(X_sample, self._snapshot("float64"))
+        X_large = np.resize(X_sample, (max(throughput_rows, X_sample.shape[0]), X_sample.shape[1]))
+
+        report = {}
+        for mode in modes:
+            if mode != "float64" and not self.fused:
+                report[mode] = {"max_abs_error": None, "accepted": False, "rows_per_second": None,
+                                "reason": "reduced precision needs a fused linear kernel"}
+                continue
+            active = self._snapshot(mode)
+            scores, _ = self.score_all(X_sample.astype(active[5]), active)
+            max_abs_error = float(np.max(np.abs(scores - reference))) if scores.size else 0.0
+
+            X_mode = X_large.astype(active[5])
+            self.score_all(X_mode, active)
+            start = time.perf_counter()
+            repeats = 5
+            for _ in range(repeats):
+                self.score_all(X_mode, active)
+            elapsed = (time.perf_counter() - start) / repeats
+            report[mode] = {"max_abs_error": max_abs_error,
+                            "accepted": max_abs_error <= tolerance,
+                            "rows_per_second": X_mode.shape[0] / elapsed if elapsed > 0 else None}
+        return report
+
+    def set_precision(self, mode, X_sample, tolerance):
+        """Switch the kernel to a precision mode, refusing it if it exceeds tolerance on X_sample"""
+        if mode not in PRECISION_MODES:
+            raise ValueError(f"Unknown precision '{mode}', expected one of {list(PRECISION_MODES)}")
+        self.precision_report = self.check_precision(X_sample, tolerance)
+        result = self.precision_report[mode]
+        if not result["accepted"]:
+            raise ValueError(result.get("reason") or
+                             f"{mode} max abs error {result['max_abs_error']:.3g} exceeds tolerance {tolerance:g}")
+        with self._lock:
+            self.precision = mode
+            self._active = self._snapshot(mode)
+
+    def score_all(self, X, active=None):
+        """Score a batch with every version: returns ((n_rows, n_versions), per-version seconds)
+
+        Per-version seconds is None for the fused kernel, which scores all versions at once.
+        """
+        names, models, weights, intercepts, _, _, feature_map = active or self._active
+        if weights is not None:
+            if feature_map is not None:
+                X = feature_map(X)
+            scores = X @ weights
+            scores += intercepts
+            return scores, None
+
+        scores = np.empty((X.shape[0], len(models)))
+        latencies = []
+        for i, model in enumerate(models):
+            start = time.perf_counter()
+            scores[:, i] = np.ravel(model.predict(X))
+            latencies.append(time.perf_counter() - start)
+        return scores, latencies
+
+    def _route(self, traffic_percents):
+        """Pick the version index serving this request by canary traffic percentage"""
+        draw = self._random.uniform(0, 100)
+        cumulative = 0.0
+        for i, percent in enumerate(traffic_percents):
+            if percent <= 0:
+                continue
+            cumulative += percent
+            if draw < cumulative:
+                return i
+        return 0
+
+    def predict(self, X):
+        """Return (predictions of the serving version, serving version name)"""
+        active = self._active
+        names, traffic_percents = active[0], active[4]
+        if X.dtype.kind in "USV":
+            # Same contract as sklearn's predict: no implicit string-to-number parsing
+            raise ValueError("dtype='numeric' is not compatible with arrays of bytes/strings."
+                             "Convert your data to numeric values explicitly instead.")
+        if X.dtype != active[5]:
+            X = X.astype(active[5])
+        if not np.isfinite(X).all():
+            # The matrix product would return NaN scores where sklearn's predict raises
+            problem = "NaN" if np.isnan(X).any() else f"infinity or a value too large for {X.dtype!r}"
+            raise ValueError(f"Input X contains {problem}.")
+        start = time.perf_counter()
+        scores, latencies = self.score_all(X, active)
+        elapsed = time.perf_counter() - start
+        served = self._route(traffic_percents) if len(names) > 1 else 0
+
+        try:
+            self._queue.put_nowait((time.time(), names, scores, latencies, elapsed, served))
+        except queue.Full:
+            self.comparisons_dropped += 1
+        return scores[:, served], names[served]
+
+    def _record(self, names, scores, latencies, elapsed, served):
+        """Update kernel and per-version stats (runs on the comparison thread)"""
+        kernel = self.kernel_stats
+        kernel.batches_scored += 1
+        kernel.batches_timed += 1
+        kernel.rows_scored += scores.shape[0]
+        kernel.latency_seconds += elapsed
+        kernel.max_latency_seconds = max(kernel.max_latency_seconds, elapsed)
+
+        primary = scores[:, 0]
+        for i, name in enumerate(names):
+            stats = self.stats[name]
+            stats.batches_scored += 1
+            stats.rows_scored += scores.shape[0]
+            if latencies is not None:
+                stats.batches_timed += 1
+                stats.latency_seconds += latencies[i]
+                stats.max_latency_seconds = max(stats.max_latency_seconds, latencies[i])
+            if i == served:
+                stats.requests_served += 1
+            if i == 0:
+                continue
+            diff = np.abs(scores[:, i] - primary)
+            stats.rows_compared += diff.size
+            stats.rows_disagreeing += int(np.count_nonzero(diff > self.disagreement_tolerance))
+            stats.abs_diff_sum += float(diff.sum())
+            if diff.size:
+                stats.max_abs_diff = max(stats.max_abs_diff, float(diff.max()))
+
+    def _comparison_loop(self):
+        log_file = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            timestamp, names, scores, latencies, elapsed, served = item
+            try:
+                self._record(names, scores, latencies, elapsed, served)
+                if self.comparison_log_path:
+                    if log_file is None:
+                        log_file = open(self.comparison_log_path, "a")
+                    log_file.write(json.dumps({
+                        "timestamp": timestamp,
+                        "served": names[served],
+                        "predictions": {name: scores[:, i].tolist() for i, name in enumerate(names)},
+                    }) + "\n")
+                    log_file.flush()
+            except Exception as e:
+                print(f"⚠️ Shadow comparison failed: {e}")
+            finally:
+                self._queue.task_done()
+        if log_file is not None:
+            log_file.close()
+
+    def flush(self):
+        """Wait until all queued comparisons have been processed"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def report(self):
+        """Per-version configuration and statistics"""
+        return {
+            "fused": self.fused,
+            "precision": self.precision,
+            "precision_check": self.precision_report,
+            "comparisons_pending": self._queue.qsize(),
+            "comparisons_dropped": self.comparisons_dropped,
+            "kernel": {key: value for key, value in self.kernel_stats.to_dict().items()
+                       if key in ("batches_scored", "rows_scored", "mean_latency_ms", "max_latency_ms")},
+            "versions": [
+                {"name": name, "role": role, "traffic_percent": percent, **self.stats[name].to_dict()}
+                for name, role, percent in zip(self.names, self.roles, self.traffic_percents)
+            ],
+        }
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Constant-memory streaming feature statistics and drift sketches
+
+FeatureSketch keeps, per feature, a running count/mean/M2 (merged batch-wise
+with Chan's parallel update) and a fixed-edge histogram whose edges are the
+training data's quantiles. Both are mergeable (add counts, combine moments)
+and their size depends only on n_features x n_bins, never on traffic.
+
+Training builds a reference sketch from the training features and logs it
+as an MLflow artifact. At serving time DriftMonitor copies each request
+batch into a preallocated buffer; full buffers are handed to a background
+thread that folds them into the live sketch in one vectorized update. While
+the fold keeps up, the request path only pays for a finiteness check and the
+copy; under sustained back-to-back load it runs out of spare buffers and
+folds inline instead (counted in folds_inline, and what --benchmark measures
+at large batches). Rows containing NaN or Inf are skipped.
+Drift is reported per feature as PSI, a histogram-based KS statistic and the
+mean shift in reference standard deviations. Features are only flagged as
+drifted once min_rows live rows have been seen; before that PSI on a handful
+of rows is noise and `drifted` is reported as null. Quantiles are
+interpolated inside histogram bins and clamped to the observed min/max, so
+they are approximate.
+
+Usage:
+    python monitoring.py --benchmark     # per-request overhead by batch size
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+REFERENCE_ARTIFACT = "monitoring/reference_sketch.json"
+DEFAULT_BINS = 32
+PSI_DRIFT_THRESHOLD = 0.2
+DEFAULT_MIN_ROWS = 500
+
+
+class FeatureSketch:
+    """Mergeable per-feature moments + quantile histogram with fixed edges"""
+    def __init__(self, edges, feature_names=None):
+        # edges: (n_features, n_bins + 1), bin i covers [edges[i], edges[i+1]);
+        # counts get two extra slots for values below the first / above the last edge
+        self.edges = np.asarray(edges, dtype=np.float64)
+        n_features, n_edges = self.edges.shape
+        self.feature_names = list(feature_names or [f"feature_{i + 1}" for i in range(n_features)])
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+        self.counts = np.zeros((n_features, n_edges + 1), dtype=np.int64)
+        self._offsets = np.arange(n_features)[:, None] * (n_edges + 1)
+
+    @classmethod
+    def from_data(cls, X, n_bins=DEFAULT_BINS, feature_names=None):
+        """Build a sketch whose edges are the quantiles of X, then add X to it"""
+        X = np.asarray(X, dtype=np.float64)
+        edges = np.quantile(X, np.linspace(0, 1, n_bins + 1), axis=0).T
+        sketch = cls(edges, feature_names)
+        sketch.update(X)
+        return sketch
+
+    @property
+    def n_features(self):
+        return self.edges.shape[0]
+
+    def update(self, X):
+        """Fold a (n_rows, n_features) batch into the sketch"""
+        n = X.shape[0]
+        if n == 0:
+            return
+        # Feature-major copy so every per-feature pass below reads contiguous memory
+        XT = np.ascontiguousarray(X.T)
+        batch_mean = XT.mean(axis=1)
+        centered = XT - batch_mean[:, None]
+        batch_m2 = np.einsum("ij,ij->i", centered, centered)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += batch_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        np.minimum(self.min, XT.min(axis=1), out=self.min)
+        np.maximum(self.max, XT.max(axis=1), out=self.max)
+
+        # searchsorted per feature, then one bincount over flattened (feature, bin) ids
+        bins = np.empty(XT.shape, dtype=np.int64)
+        for j in range(self.n_features):
+            bins[j] = np.searchsorted(self.edges[j], XT[j], side="right")
+        bins += self._offsets
+        self.counts += np.bincount(bins.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other):
+        """Merge another sketch with identical edges into this one"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge sketches with different bin edges")
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * (other.count / total)
+        self.m2 += other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        self.counts += other.counts
+        return self
+
+    def empty_copy(self):
+        """New empty sketch sharing these edges"""
+        return FeatureSketch(self.edges, self.feature_names)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.zeros(self.n_features)
+
+    def quantiles(self, qs):
+        """Approximate quantiles per feature: interpolated inside the histogram bins, clamped to the observed range"""
+        qs = np.atleast_1d(qs)
+        result = np.full((self.n_features, qs.size), np.nan)
+        if self.count == 0:
+            return result
+        for j in range(self.n_features):
+            # tail slots are clamped to the outer edges
+            cdf = np.cumsum(self.counts[j]) / self.count
+            edges = np.concatenate(([self.edges[j, 0]], self.edges[j], [self.edges[j, -1]]))
+            lower_cdf = np.concatenate(([0.0], cdf[:-1]))
+            for k, q in enumerate(qs):
+                i = min(int(np.searchsorted(cdf, q, side="left")), cdf.size - 1)
+                width = cdf[i] - lower_cdf[i]
+                frac = (q - lower_cdf[i]) / width if width > 0 else 0.0
+                lo, hi = edges[i], edges[min(i + 1, edges.size - 1)]
+                result[j, k] = lo + frac * (hi - lo)
+        return np.clip(result, self.min[:, None], self.max[:, None])
+
+    def to_dict(self):
+        return {
+            "feature_names": self.feature_names,
+            "count": int(self.count),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+            "min": self.min.tolist(),
+            "max": self.max.tolist(),
+            "edges": self.edges.tolist(),
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["edges"], data.get("feature_names"))
+        sketch.count = int(data["count"])
+        sketch.mean = np.asarray(data["mean"], dtype=np.float64)
+        sketch.m2 = np.asarray(data["m2"], dtype=np.float64)
+        # Sketches logged before min/max were tracked: edges span the reference data
+        sketch.min = np.asarray(data.get("min", sketch.edges[:, 0]), dtype=np.float64)
+        sketch.max = np.asarray(data.get("max", sketch.edges[:, -1]), dtype=np.float64)
+        sketch.counts = np.asarray(data["counts"], dtype=np.int64)
+        return sketch
+
+
+def drift_scores(reference, live, eps=1e-6):
+    """Per-feature PSI, KS (on histogram CDFs) and mean shift in reference std units"""
+    ref_p = reference.counts / max(reference.count, 1)
+    live_p = live.counts / max(live.count, 1)
+    psi = ((live_p - ref_p) * np.log((live_p + eps) / (ref_p + eps))).sum(axis=1)
+    ks = np.abs(np.cumsum(live_p, axis=1) - np.cumsum(ref_p, axis=1)).max(axis=1)
+    ref_std = np.sqrt(reference.variance)
+    mean_shift = np.abs(live.mean - reference.mean) / np.where(ref_std > 0, ref_std, 1.0)
+    return psi, ks, mean_shift
+
+
+class DriftMonitor:
+    """Live input sketch fed through preallocated batch buffers, compared to a reference sketch"""
+    def __init__(self, reference, buffer_rows=1024, spare_buffers=2, min_rows=DEFAULT_MIN_ROWS):
+        self.reference = reference
+        self.min_rows = min_rows
+        self.live = reference.empty_copy()
+        self.rows_skipped = 0
+        self.folds_inline = 0
+        self._buffer = np.empty((buffer_rows, reference.n_features))
+        self._filled = 0
+        self._lock = threading.Lock()
+        self._sketch_lock = threading.Lock()
+        self._spare = queue.Queue()
+        for _ in range(spare_buffers):
+            self._spare.put(np.empty_like(self._buffer))
+        self._full = queue.Queue()
+        self._worker = threading.Thread(target=self._fold_loop, daemon=True)
+        self._worker.start()
+
+    def observe(self, X):
+        """Record a request batch; full buffers are folded into the sketch in the background"""
+        if X.ndim != 2 or X.shape[1] != self.reference.n_features:
+            self.rows_skipped += X.shape[0] if X.ndim else 1
+            return
+        finite = np.isfinite(X).all(axis=1)
+        if not finite.all():
+            # One NaN would poison the running mean/M2 for good
+            self.rows_skipped += int(X.shape[0] - finite.sum())
+            X = X[finite]
+        with self._lock:
+            start = 0
+            while start < X.shape[0]:
+                take = min(X.shape[0] - start, self._buffer.shape[0] - self._filled)
+                self._buffer[self._filled:self._filled + take] = X[start:start + take]
+                self._filled += take
+                start += take
+                if self._filled == self._buffer.shape[0]:
+                    self._hand_off()
+
+    def _hand_off(self):
+        """Queue the full buffer for folding and continue in a spare one"""
+        try:
+            spare = self._spare.get_nowait()
+        except queue.Empty:
+            # Folding has fallen behind: fold inline rather than grow memory
+            self.folds_inline += 1
+            self._fold(self._buffer)
+        else:
+            self._full.put(self._buffer)
+            self._buffer = spare
+        self._filled = 0
+
+    def _fold(self, rows):
+        with self._sketch_lock:
+            self.live.update(rows)
+
+    def _fold_loop(self):
+        while True:
+            buffer = self._full.get()
+            try:
+                self._fold(buffer)
+            except Exception as e:
+                print(f"⚠️ Drift sketch update failed: {e}")
+            finally:
+                self._spare.put(buffer)
+                self._full.task_done()
+
+    def _flush(self):
+        """Fold everything observed so far (caller holds self._lock)"""
+        self._full.join()
+        self._fold(self._buffer[:self._filled])
+        self._filled = 0
+
+    def report(self, psi_threshold=PSI_DRIFT_THRESHOLD):
+        with self._lock:
+            self._flush()
+            psi, ks, mean_shift = drift_scores(self.reference, self.live)
+            enough_rows = self.live.count >= self.min_rows
+            live_std = np.sqrt(self.live.variance)
+            live_q = self.live.quantiles([0.05, 0.5, 0.95])
+            ref_q = self.reference.quantiles([0.05, 0.5, 0.95])
+            features = []
+            for j, name in enumerate(self.live.feature_names):
+                features.append({
+                    "name": name,
+                    "live": {"mean": float(self.live.mean[j]), "std": float(live_std[j]),
+                             "p05": float(live_q[j, 0]), "p50": float(live_q[j, 1]), "p95": float(live_q[j, 2])},
+                    "reference": {"mean": float(self.reference.mean[j]),
+                                  "std": float(np.sqrt(self.reference.variance[j])),
+                                  "p05": float(ref_q[j, 0]), "p50": float(ref_q[j, 1]), "p95": float(ref_q[j, 2])},
+                    "psi": float(psi[j]),
+                    "ks": float(ks[j]),
+                    "mean_shift_std": float(mean_shift[j]),
+                    "drifted": bool(psi[j] > psi_threshold) if enough_rows else None,
+                })
+            return {
+                "rows_observed": int(self.live.count),
+                "rows_skipped": self.rows_skipped,
+                "folds_inline": self.folds_inline,
+                "reference_rows": int(self.reference.count),
+                "psi_threshold": psi_threshold,
+                "min_rows": self.min_rows,
+                "drift_detected": any(f["drifted"] for f in features) if enough_rows else None,
+                "features": features,
+            }
+
+
+def benchmark_overhead(batch_sizes=(1, 10, 100, 1000), repeats=2000):
+    """Per-request cost of DriftMonitor.observe next to the predict kernel it rides along"""
+    rng = np.random.default_rng(42)
+    reference = FeatureSketch.from_data(rng.normal(size=(1000, 3)))
+    weights = rng.normal(size=3)
+    print("⏱️ Monitoring overhead per request (request path / including background folds)")
+    print(f"{'batch':>8}{'predict (us)':>15}{'observe (us)':>15}{'with folds (us)':>18}{'overhead':>10}"
+          f"{'inline folds':>14}")
+    for batch_size in batch_sizes:
+        monitor = DriftMonitor(reference)
+        X = rng.normal(size=(batch_size, 3))
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            X @ weights
+        predict_us = (time.perf_counter() - start) / repeats * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            monitor.observe(X)
+        observe_us = (time.perf_counter() - start) / repeats * 1e6
+        monitor._full.join()
+        total_us = (time.perf_counter() - start) / repeats * 1e6
+        print(f"{batch_size:>8}{predict_us:>15.2f}{observe_us:>15.2f}{total_us:>18.2f}"
+              f"{observe_us / predict_us:>9.1f}x{monitor.folds_inline:>14}")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        benchmark_overhead()
+    else:
+        print(__doc__)
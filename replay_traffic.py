@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Replay captured prediction traffic against one or more servers
+
+Reads the gzip JSONL captures written by traffic_capture.TrafficRecorder and
+sends every request to each target in turn:
+
+  --speed 1      original arrival times (open loop: requests are sent on
+                 schedule whether or not earlier ones have returned)
+  --speed 4      4x compressed inter-arrival times
+  --speed max    as fast as possible with --concurrency closed-loop workers
+
+Reports latency percentiles (measured from the scheduled send time in open
+loop mode), errors, throughput and how far sends lagged behind schedule,
+side by side for all targets, so a candidate build can be compared with the
+current one on the real request-size mix and burstiness.
+
+Usage:
+    python replay_traffic.py captures/ --target http://localhost:8080
+    python replay_traffic.py captures/ --speed max --concurrency 16 \\
+        --target http://localhost:8080 --target http://localhost:8081
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from traffic_capture import read_capture
+
+_local = threading.local()
+
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def _send(target, record, timeout):
+    """POST one captured request; returns (response time seconds, ok)"""
+    start = time.perf_counter()
+    try:
+        response = _session().post(target + record["path"], data=record["body"].encode("utf-8"),
+                                   headers={"Content-Type": "application/json"}, timeout=timeout)
+        ok = response.status_code < 500
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def replay(records, target, speed=1.0, concurrency=32, timeout=30.0):
+    """Replay records against target; returns latencies, error count, lags and wall time
+
+    In open-loop mode latency is measured from the scheduled send time, so
+    time spent waiting for a free worker counts against the target instead
+    of being hidden (coordinated omission); lags record how late each
+    request actually went out.
+    """
+    latencies = np.empty(len(records))
+    oks = np.zeros(len(records), dtype=bool)
+    lags = np.zeros(len(records))
+    t0 = records[0]["t"] if records else 0.0
+
+    def run(i, due=None):
+        if due is not None:
+            lags[i] = max(0.0, time.perf_counter() - due)
+        response_time, oks[i] = _send(target, records[i], timeout)
+        latencies[i] = lags[i] + response_time
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if speed is None:
+            list(pool.map(run, range(len(records))))
+        else:
+            futures = []
+            for i, record in enumerate(records):
+                due = start + (record["t"] - t0) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(run, i, due))
+            for future in futures:
+                future.result()
+    wall = time.perf_counter() - start
+    return {"latencies": latencies, "errors": int((~oks).sum()), "lags": lags, "wall_seconds": wall}
+
+
+def summarize(result):
+    latencies_ms = result["latencies"] * 1000
+    n = latencies_ms.size
+    p50, p90, p99, p999 = np.percentile(latencies_ms, [50, 90, 99, 99.9]) if n else (np.nan,) * 4
+    return {
+        "requests": n,
+        "errors": result["errors"],
+        "throughput_rps": n / result["wall_seconds"] if result["wall_seconds"] > 0 else float("nan"),
+        "mean_ms": float(latencies_ms.mean()) if n else float("nan"),
+        "p50_ms": p50,
+        "p90_ms": p90,
+        "p99_ms": p99,
+        "p99.9_ms": p999,
+        "max_ms": float(latencies_ms.max()) if n else float("nan"),
+        "max_send_lag_ms": float(result["lags"].max() * 1000) if n else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured prediction traffic")
+    parser.add_argument("captures", nargs="+", help="capture files or directories")
+    parser.add_argument("--target", action="append", required=True, help="server base URL (repeatable)")
+    parser.add_argument("--speed", default="1", help="replay speed factor, or 'max'")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    args = parser.parse_args()
+
+    records = read_capture(args.captures)[:args.limit]
+    if not records:
+        print("❌ No captured requests found")
+        return
+    speed = None if args.speed == "max" else float(args.speed)
+    duration = records[-1]["t"] - records[0]["t"]
+    print(f"📼 {len(records)} captured requests spanning {duration:.1f}s, "
+          f"replaying at {'max speed' if speed is None else f'{speed:g}x'}")
+
+    summaries = []
+    for target in args.target:
+        print(f"🔄 Replaying against {target}...")
+        summaries.append(summarize(replay(records, target.rstrip("/"), speed, args.concurrency, args.timeout)))
+
+    print(f"\n{'':<18}" + "".join(f"{t[-28:]:>30}" for t in args.target))
+    for key in summaries[0]:
+        values = "".join(f"{s[key]:>30.2f}" if isinstance(s[key], float) else f"{s[key]:>30}" for s in summaries)
+        print(f"{key:<18}{values}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import requests
 import json
 from pathlib import Path
 
+from step_runner import StepRunner
+
 def run_command(cmd, description, shell=True, check=True):
     """Run a command and handle output"""
     print(f"🔄 {description}...")
@@ -62,17 +64,22 @@ def main():
     if not wait_for_service("http://localhost:9002/minio/health/live", service_name="MinIO"):
         return
     
+    # Python steps run in one persistent worker so heavy imports happen once
+    step_runner = StepRunner()
+    if not step_runner.start():
+        return
+    
     # Step 3: Setup MinIO bucket
     print("\n🪣 STEP 3: Setting up MinIO Bucket")
-    run_command("python setup_minio_bucket.py", "Creating MLflow artifacts bucket")
+    step_runner.run_step("setup_minio_bucket", "Creating MLflow artifacts bucket")
     
     # Step 4: Generate data
     print("\n📊 STEP 4: Generating Training Data")
-    run_command("python generate_data.py", "Generating synthetic dataset")
+    step_runner.run_step("generate_data", "Generating synthetic dataset")
     
     # Step 5: Train model
     print("\n🤖 STEP 5: Training Model")
-    run_command("python train.py", "Training linear regression model")
+    step_runner.run_step("train", "Training linear regression model")
     
     # Step 6: Check MLflow
     print("\n📈 STEP 6: Checking MLflow Results")
@@ -91,7 +98,8 @@ def main():
     
     # Step 7: Check MinIO
     print("\n💾 STEP 7: Checking MinIO Storage")
-    run_command("python check_minio_contents.py", "Checking stored artifacts")
+    step_runner.run_step("check_minio_contents", "Checking stored artifacts")
+    step_runner.stop()
     
     # Step 8: Start Minikube
     print("\n☸️ STEP 8: Starting Minikube")
@@ -1,19 +1,26 @@
+import os
 import boto3
 from botocore.client import Config
+from functools import lru_cache
 import time
 
-def create_minio_bucket():
-    """Create the mlflow-artifacts bucket in MinIO"""
-    
-    # Configure MinIO client
-    s3_client = boto3.client(
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """Return a MinIO client, created once per process and reused"""
+    return boto3.client(
         's3',
-        endpoint_url='http://localhost:9002',
+        endpoint_url=os.environ.get('MLFLOW_S3_ENDPOINT_URL', 'http://localhost:9002'),
         aws_access_key_id='minio',
         aws_secret_access_key='minio123',
         config=Config(signature_version='s3v4'),
         region_name='us-east-1'
     )
+
+def create_minio_bucket():
+    """Create the mlflow-artifacts bucket in MinIO"""
+    
+    # Configure MinIO client
+    s3_client = get_s3_client()
     
     bucket_name = 'mlflow-artifacts'
     
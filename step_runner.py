@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Persistent in-process step runner for the pipeline scripts
+
+Instead of launching a fresh Python interpreter for every step (and paying
+pandas/sklearn/mlflow/boto3 import time again each time), the runner keeps a
+single long-lived worker process. Heavy modules are imported once when the
+worker starts and the step entry functions are called inside it. Each step is
+isolated by a timeout: a step that hangs is killed together with the worker,
+and a fresh worker is started for the next step. A step fails when its entry
+function raises or returns False.
+
+Usage:
+    python step_runner.py                 # run setup -> data -> train -> check
+    python step_runner.py train           # run selected steps
+    python step_runner.py --benchmark     # per-step overhead, subprocess vs worker
+"""
+
+import importlib
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# step name -> (module, entry function)
+STEPS = {
+    "setup_minio_bucket": ("setup_minio_bucket", "create_minio_bucket"),
+    "generate_data": ("generate_data", "generate_sample_data"),
+    "train": ("train", "main"),
+    "check_minio_contents": ("check_minio_contents", "check_minio_contents"),
+}
+
+# Imported once when the worker starts, then shared by every step
+PRELOAD_MODULES = [
+    "numpy",
+    "pandas",
+    "sklearn.linear_model",
+    "sklearn.model_selection",
+    "sklearn.metrics",
+    "boto3",
+    "mlflow",
+    "mlflow.sklearn",
+]
+
+DEFAULT_TIMEOUT = 600
+
+
+def _noop():
+    """Empty step used to measure dispatch overhead"""
+    return None
+
+
+def _worker_loop(conn):
+    """Worker process: preload heavy modules, then execute steps on request"""
+    os.chdir(PROJECT_DIR)
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+
+    preload_start = time.perf_counter()
+    for module_name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            # Missing optional dependency: the step needing it will report it
+            pass
+    conn.send({"ready": True, "preload_seconds": time.perf_counter() - preload_start})
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        module_name, func_name = message
+        start = time.perf_counter()
+        try:
+            if module_name == "step_runner":
+                func = globals()[func_name]
+            else:
+                func = getattr(importlib.import_module(module_name), func_name)
+            result = func()
+            # Step entry functions return False (or raise) on failure
+            ok = result is not False
+            conn.send({"ok": ok, "result": repr(result), "error": None,
+                       "seconds": time.perf_counter() - start})
+        except BaseException as e:
+            conn.send({"ok": False, "result": None,
+                       "error": f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+                       "seconds": time.perf_counter() - start})
+
+
+class StepRunner:
+    """Run pipeline steps inside one long-lived worker process"""
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self.preload_seconds = None
+
+    def start(self):
+        """Start the worker and wait until heavy modules are imported; returns False if it never got ready"""
+        if self._process is not None and self._process.is_alive():
+            return True
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            if not self._conn.poll(self.timeout):
+                print(f"❌ Step worker did not finish preloading within {self.timeout}s")
+                self._kill()
+                return False
+            ready = self._conn.recv()
+        except (EOFError, OSError) as e:
+            # Worker died during preload (import crash, chdir failure, ...)
+            self._process.join(timeout=1)
+            print(f"❌ Step worker died while starting (exit code {self._process.exitcode}): {e!r}")
+            self._kill()
+            return False
+        self.preload_seconds = ready["preload_seconds"]
+        print(f"✅ Step worker ready (preloaded modules in {self.preload_seconds:.2f}s)")
+        return True
+
+    def stop(self):
+        """Shut the worker down"""
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def _kill(self):
+        """Kill the worker without waiting for it to finish"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+            self._process = None
+            self._conn = None
+
+    def _restart(self):
+        """Kill a stuck or crashed worker and start a fresh one"""
+        self._kill()
+        self.start()
+
+    def run_call(self, module_name, func_name, description=None, timeout=None):
+        """Run module.func_name() in the worker, returning a result dict"""
+        description = description or f"{module_name}.{func_name}"
+        timeout = self.timeout if timeout is None else timeout
+        dispatch_start = time.perf_counter()
+        if not self.start():
+            return {"ok": False, "result": None, "error": "step worker failed to start",
+                    "seconds": None, "wall_seconds": time.perf_counter() - dispatch_start}
+
+        try:
+            self._conn.send((module_name, func_name))
+            if not self._conn.poll(timeout):
+                print(f"❌ {description} timed out after {timeout}s, restarting worker")
+                self._restart()
+                return {"ok": False, "result": None, "error": f"timeout after {timeout}s",
+                        "seconds": timeout, "wall_seconds": time.perf_counter() - dispatch_start}
+            response = self._conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            # Worker died (e.g. a native crash inside the step)
+            print(f"❌ {description} crashed the worker: {e}")
+            self._restart()
+            return {"ok": False, "result": None, "error": f"worker crashed: {e}",
+                    "seconds": None, "wall_seconds": time.perf_counter() - dispatch_start}
+
+        response["wall_seconds"] = time.perf_counter() - dispatch_start
+        return response
+
+    def run_step(self, step_name, description=None, timeout=None):
+        """Run a named pipeline step and print its outcome"""
+        module_name, func_name = STEPS[step_name]
+        description = description or step_name
+        print(f"🔄 {description}...")
+        response = self.run_call(module_name, func_name, description, timeout)
+        if response["ok"]:
+            print(f"✅ {description} completed in {response['wall_seconds']:.2f}s")
+        elif response["error"]:
+            print(f"❌ {description} failed: {response['error']}")
+        else:
+            print(f"❌ {description} failed (returned {response['result']})")
+        return response
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def benchmark_step_overhead(repeats=3):
+    """Compare fixed per-step cost: fresh interpreter vs persistent worker
+
+    The subprocess column is the time to start Python and import the step's
+    module (and through it pandas/sklearn/mlflow/boto3); the worker column is
+    the round trip of dispatching an empty step to the warm worker.
+    """
+    with StepRunner() as runner:
+        print("⏱️ Per-step overhead (excluding the step's own work)")
+        print(f"{'step':<24}{'subprocess (s)':>16}{'worker (s)':>14}")
+
+        worker_times = []
+        for _ in range(repeats):
+            worker_times.append(runner.run_call("step_runner", "_noop")["wall_seconds"])
+        worker_overhead = min(worker_times)
+
+        for step_name, (module_name, _) in STEPS.items():
+            subprocess_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-c", f"import {module_name}"],
+                               cwd=PROJECT_DIR, capture_output=True)
+                subprocess_times.append(time.perf_counter() - start)
+            print(f"{step_name:<24}{min(subprocess_times):>16.3f}{worker_overhead:>14.4f}")
+
+        print(f"{'worker startup (once)':<24}{'':>16}{runner.preload_seconds:>14.3f}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--benchmark" in argv:
+        benchmark_step_overhead()
+        return True
+
+    step_names = argv or list(STEPS)
+    unknown = [name for name in step_names if name not in STEPS]
+    if unknown:
+        print(f"❌ Unknown steps: {unknown}. Available: {list(STEPS)}")
+        return False
+
+    with StepRunner() as runner:
+        results = [runner.run_step(name) for name in step_names]
+    return all(r["ok"] for r in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
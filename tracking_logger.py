@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Asynchronous batched MLflow logging for training runs
+
+Every mlflow.log_param / log_metric / set_tag call is one synchronous HTTP
+round trip to the tracking server. AsyncRunLogger buffers them instead and a
+background thread sends the buffer with a single log_batch request whenever
+it reaches max_batch entries or its oldest entry is flush_interval seconds
+old. Artifacts (log_dict / log_text / log_artifact) are uploaded by a small
+thread pool, so they overlap with training and with each other.
+
+Closing the logger (or leaving its `with` block) flushes everything that is
+still buffered, waits for the uploads and raises if any batch or upload
+failed, so a run never finishes with silently missing data. Metric
+timestamps are taken when the metric is logged, not when it is sent.
+
+Usage:
+    python tracking_logger.py --benchmark     # tracking overhead vs number of logged metrics
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+# Tracking server limits for one log_batch request
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_TAGS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+
+
+class AsyncRunLogger:
+    """Buffer params/metrics/tags for one run and send them with log_batch off the training thread"""
+    def __init__(self, run_id, client=None, max_batch=MAX_ENTITIES_PER_BATCH, flush_interval=2.0,
+                 artifact_workers=4):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.max_batch = max(1, min(max_batch, MAX_ENTITIES_PER_BATCH))
+        self.flush_interval = flush_interval
+        self.errors = []
+        self.batches_sent = 0
+        self.entries_sent = 0
+
+        self._metrics = []
+        self._params = {}
+        self._tags = {}
+        self._oldest = None
+        self._sending = False
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._uploads = ThreadPoolExecutor(max_workers=artifact_workers, thread_name_prefix="mlflow-artifacts")
+        self._upload_futures = []
+        self._worker = threading.Thread(target=self._flush_loop, daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def for_active_run(cls, **kwargs):
+        """Logger for the run opened with mlflow.start_run()"""
+        run = mlflow.active_run()
+        if run is None:
+            raise RuntimeError("No active MLflow run; call mlflow.start_run() first")
+        return cls(run.info.run_id, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Don't mask an exception from the training code with a logging error
+        self.close(raise_on_error=exc_type is None)
+
+    # ---- buffered entities (called on the training thread) ----
+
+    def _pending(self):
+        return len(self._metrics) + len(self._params) + len(self._tags)
+
+    def _added(self):
+        # Wake the sender to arm the interval timer, or to send a full batch
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+            self._cond.notify_all()
+        elif self._pending() >= self.max_batch:
+            self._cond.notify_all()
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("AsyncRunLogger is closed")
+
+    def log_param(self, key, value):
+        value = str(value)
+        with self._cond:
+            self._check_open()
+            if self._params.get(key, value) != value:
+                # Same rule the tracking server enforces, raised where the mistake is made
+                raise ValueError(f"Param '{key}' is already buffered with value '{self._params[key]}'")
+            self._params[key] = value
+            self._added()
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0, timestamp=None):
+        metric = Metric(key, float(value), timestamp or int(time.time() * 1000), step)
+        with self._cond:
+            self._check_open()
+            self._metrics.append(metric)
+            self._added()
+
+    def log_metrics(self, metrics, step=0):
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(key, value, step, timestamp)
+
+    def set_tag(self, key, value):
+        with self._cond:
+            self._check_open()
+            self._tags[key] = str(value)
+            self._added()
+
+    def set_tags(self, tags):
+        for key, value in tags.items():
+            self.set_tag(key, value)
+
+    # ---- background batch sender ----
+
+    def _take_batch(self):
+        """Remove up to one log_batch request worth of entities from the buffer"""
+        # Params, then tags, then metrics share the max_batch budget
+        budget = self.max_batch
+        params = list(self._params.items())[:min(MAX_PARAMS_TAGS_PER_BATCH, budget)]
+        budget -= len(params)
+        tags = list(self._tags.items())[:min(MAX_PARAMS_TAGS_PER_BATCH, budget)]
+        budget -= len(tags)
+        n_metrics = max(0, min(MAX_METRICS_PER_BATCH, budget))
+        metrics = self._metrics[:n_metrics]
+        del self._metrics[:n_metrics]
+        for key, _ in params:
+            del self._params[key]
+        for key, _ in tags:
+            del self._tags[key]
+        self._oldest = time.monotonic() if self._pending() else None
+        return metrics, [Param(k, v) for k, v in params], [RunTag(k, v) for k, v in tags]
+
+    def _due(self):
+        if self._pending() == 0:
+            return False
+        return (self._flush_requested or self._closed or self._pending() >= self.max_batch
+                or time.monotonic() - self._oldest >= self.flush_interval)
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed:
+                        return
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    timeout = None if self._oldest is None else self.flush_interval - (time.monotonic() - self._oldest)
+                    self._cond.wait(timeout if timeout is None else max(timeout, 0.0))
+                metrics, params, tags = self._take_batch()
+                self._sending = True
+            try:
+                self.client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+                error = None
+            except Exception as e:
+                error = e
+            with self._cond:
+                self._sending = False
+                if error is None:
+                    self.batches_sent += 1
+                    self.entries_sent += len(metrics) + len(params) + len(tags)
+                else:
+                    self.errors.append(f"log_batch of {len(metrics)} metrics, {len(params)} params, "
+                                       f"{len(tags)} tags failed: {error}")
+                self._cond.notify_all()
+
+    # ---- artifacts ----
+
+    def _upload(self, description, fn, *args):
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                with self._cond:
+                    self.errors.append(f"{description} failed: {e}")
+        with self._cond:
+            self._check_open()
+            self._upload_futures.append(self._uploads.submit(run))
+
+    def log_dict(self, dictionary, artifact_file):
+        # Serialize now so later changes to the dict don't leak into the upload
+        self.log_text(json.dumps(dictionary, indent=2), artifact_file)
+
+    def log_text(self, text, artifact_file):
+        self._upload(f"upload of {artifact_file}", self.client.log_text, self.run_id, text, artifact_file)
+
+    def log_artifact(self, local_path, artifact_path=None):
+        self._upload(f"upload of {local_path}", self.client.log_artifact, self.run_id, local_path, artifact_path)
+
+    # ---- end of run ----
+
+    def flush(self):
+        """Block until everything logged so far has been sent and uploaded"""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending() or self._sending:
+                self._cond.wait()
+            futures, self._upload_futures = self._upload_futures, []
+        for future in futures:
+            future.result()
+
+    def close(self, raise_on_error=True):
+        """Flush, stop the background threads and report failed batches / uploads"""
+        if self._closed:
+            return
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self._uploads.shutdown(wait=True)
+        if self.errors:
+            for error in self.errors:
+                print(f"⚠️ MLflow logging: {error}")
+            if raise_on_error:
+                raise RuntimeError(f"{len(self.errors)} MLflow logging operation(s) failed for run {self.run_id}")
+
+    def stats(self):
+        with self._cond:
+            return {"batches_sent": self.batches_sent, "entries_sent": self.entries_sent,
+                    "pending": self._pending(), "errors": len(self.errors)}
+
+
+def benchmark_overhead(metric_counts=(10, 100, 1000, 5000), latency_ms=2.0):
+    """Time to log N metrics one call at a time vs through AsyncRunLogger, against the stand-in"""
+    from local_standin import start_standin
+
+    standin = start_standin(mlflow_port=0, s3_port=0, latency_ms=latency_ms)
+    try:
+        client = MlflowClient(tracking_uri=standin.tracking_uri)
+        experiment_id = client.create_experiment("tracking-overhead-benchmark")
+        print(f"⏱️ Tracking overhead, {latency_ms:g} ms injected latency per request")
+        print(f"{'metrics':>8}{'per-call (s)':>14}{'async loop (s)':>16}{'async total (s)':>17}"
+              f"{'batches':>9}{'speedup':>9}")
+        for n in metric_counts:
+            run_id = client.create_run(experiment_id).info.run_id
+            start = time.perf_counter()
+            for step in range(n):
+                client.log_metric(run_id, "loss", 1.0 / (step + 1), step=step)
+            sync_s = time.perf_counter() - start
+
+            run_id = client.create_run(experiment_id).info.run_id
+            start = time.perf_counter()
+            tracker = AsyncRunLogger(run_id, client)
+            for step in range(n):
+                tracker.log_metric("loss", 1.0 / (step + 1), step=step)
+            loop_s = time.perf_counter() - start
+            tracker.close()
+            total_s = time.perf_counter() - start
+
+            logged = len(client.get_metric_history(run_id, "loss"))
+            status = "" if logged == n else f"  ❌ {logged}/{n} metrics arrived"
+            print(f"{n:>8}{sync_s:>14.3f}{loop_s:>16.4f}{total_s:>17.3f}"
+                  f"{tracker.batches_sent:>9}{sync_s / total_s:>8.1f}x{status}")
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        benchmark_overhead()
+    else:
+        print(__doc__)
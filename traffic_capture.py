@@ -0,0 +1,137 @@
+"""
+Opt-in traffic capture for the prediction server
+
+TrafficRecorder samples incoming prediction requests and hands them to a
+background thread through a bounded queue; the request path only pays for a
+random draw and a queue put (requests are dropped and counted if the writer
+falls behind). The writer appends JSON lines
+{"t": arrival unix time, "path": ..., "body": ...} to gzip files in the
+capture directory and rotates them by size, keeping the newest max_files.
+
+Enabled in model_api_server.py by setting TRAFFIC_CAPTURE_DIR; see
+TrafficRecorder.from_env for the other settings. replay_traffic.py plays
+captures back against a server.
+"""
+
+import glob
+import gzip
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+CAPTURE_PATTERN = "capture-*.jsonl.gz"
+
+
+class TrafficRecorder:
+    """Sample requests and write them to rotating gzip JSONL files off the request path"""
+    def __init__(self, capture_dir, sample_rate=1.0, max_file_mb=64, max_files=10, queue_size=10000):
+        self.capture_dir = capture_dir
+        self.sample_rate = sample_rate
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.max_files = max_files
+        self.recorded = 0
+        self.dropped = 0
+        self.files_written = 0
+
+        os.makedirs(capture_dir, exist_ok=True)
+        self._random = random.Random()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._file_bytes = 0
+        self._worker = threading.Thread(target=self._write_loop, daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls):
+        """TRAFFIC_CAPTURE_DIR (required), TRAFFIC_CAPTURE_SAMPLE, TRAFFIC_CAPTURE_MAX_MB, TRAFFIC_CAPTURE_MAX_FILES"""
+        capture_dir = os.environ.get('TRAFFIC_CAPTURE_DIR')
+        if not capture_dir:
+            return None
+        return cls(capture_dir,
+                   sample_rate=float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE', '1.0')),
+                   max_file_mb=float(os.environ.get('TRAFFIC_CAPTURE_MAX_MB', '64')),
+                   max_files=int(os.environ.get('TRAFFIC_CAPTURE_MAX_FILES', '10')))
+
+    def record(self, path, body):
+        """Called on the request path: sample, timestamp and enqueue"""
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((time.time(), path, body))
+        except queue.Full:
+            self.dropped += 1
+
+    def _open_next_file(self):
+        if self._file is not None:
+            self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        name = os.path.join(self.capture_dir, f"capture-{stamp}-{self.files_written:04d}.jsonl.gz")
+        self._file = gzip.open(name, "wt", encoding="utf-8")
+        self._file_bytes = 0
+        self.files_written += 1
+
+        # Keep only the newest max_files captures
+        for old in sorted(glob.glob(os.path.join(self.capture_dir, CAPTURE_PATTERN)))[:-self.max_files]:
+            os.remove(old)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                timestamp, path, body = item
+                line = json.dumps({"t": timestamp, "path": path,
+                                   "body": body.decode("utf-8", errors="replace")}) + "\n"
+                if self._file is None or self._file_bytes + len(line) > self.max_file_bytes:
+                    self._open_next_file()
+                self._file.write(line)
+                self._file_bytes += len(line)
+                self.recorded += 1
+                if self._queue.empty():
+                    self._file.flush()
+            except Exception as e:
+                print(f"⚠️ Traffic capture write failed: {e}")
+            finally:
+                self._queue.task_done()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        """Wait until every queued request has been written"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self):
+        return {"recorded": self.recorded, "dropped": self.dropped, "pending": self._queue.qsize(),
+                "files_written": self.files_written, "sample_rate": self.sample_rate}
+
+
+def read_capture(paths):
+    """Return captured records from capture files or directories, in arrival order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, CAPTURE_PATTERN)))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ Capture path not found: {path}")
+    records = []
+    for name in sorted(files):
+        try:
+            with gzip.open(name, "rt", encoding="utf-8") as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # File still being written (no gzip trailer yet): keep what was readable
+            pass
+    records.sort(key=lambda record: record["t"])
+    return records
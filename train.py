@@ -3,19 +3,23 @@ import mlflow.sklearn
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 import os
 import time
 
+from fused_pipeline import build_training_pipeline
+from model_versions import HOLDOUT_ARTIFACT
+from monitoring import FeatureSketch, REFERENCE_ARTIFACT
+from tracking_logger import AsyncRunLogger
+
 def main():
     # Configure MinIO/S3 environment variables for MLflow
-    os.environ['MLFLOW_S3_ENDPOINT_URL'] = 'http://localhost:9002'
+    os.environ.setdefault('MLFLOW_S3_ENDPOINT_URL', 'http://localhost:9002')
     os.environ['AWS_ACCESS_KEY_ID'] = 'minio'
     os.environ['AWS_SECRET_ACCESS_KEY'] = 'minio123'
     
     # Configure MLflow
-    mlflow.set_tracking_uri("http://localhost:5001")
+    mlflow.set_tracking_uri(os.environ.get("MLFLOW_TRACKING_URI", "http://localhost:5001"))
     mlflow.set_experiment("simple-mlflow-minio-demo")
     
     print("Loading data...")
@@ -24,7 +28,7 @@ def main():
         print(f"Data loaded successfully. Shape: {data.shape}")
     except FileNotFoundError:
         print("data.csv not found. Please run 'python generate_data.py' first.")
-        return
+        return False
     
     # Prepare features and target
     X = data.iloc[:, :-1]
@@ -38,12 +42,15 @@ def main():
         X, y, test_size=0.2, random_state=42
     )
     
+    # Optional preprocessing stage in front of the regressor, e.g. PREPROCESSING="standard,poly2"
+    preprocessing = os.environ.get("PREPROCESSING", "")
+    
     # Start MLflow run
     with mlflow.start_run():
         print("Training Linear Regression model...")
         
-        # Train the model
-        model = LinearRegression()
+        # Train the model (a Pipeline when preprocessing is declared)
+        model = build_training_pipeline(preprocessing)
         model.fit(X_train, y_train)
         
         # Make predictions
@@ -54,30 +61,47 @@ def main():
         rmse = np.sqrt(mse)
         r2 = r2_score(y_test, y_pred)
         
-        # Log parameters
-        mlflow.log_param("model_type", "LinearRegression")
-        mlflow.log_param("test_size", 0.2)
-        mlflow.log_param("random_state", 42)
-        mlflow.log_param("n_features", X.shape[1])
-        mlflow.log_param("n_samples", X.shape[0])
-        
-        # Log metrics
-        mlflow.log_metric("mse", mse)
-        mlflow.log_metric("rmse", rmse)
-        mlflow.log_metric("r2_score", r2)
-        mlflow.log_metric("score", model.score(X_test, y_test))
-        
-        # Log model
-        print("Logging model to MLflow...")
-        mlflow.sklearn.log_model(
-            model, 
-            "model",
-            registered_model_name="LinearRegressionModel"
-        )
-        
-        # Log additional info
-        mlflow.set_tag("dataset", "synthetic_linear_data")
-        mlflow.set_tag("algorithm", "sklearn.LinearRegression")
+        # Params, metrics, tags and the JSON artifacts are batched and sent in the
+        # background; leaving the block flushes them and raises if any failed
+        with AsyncRunLogger.for_active_run() as tracker:
+            # Log parameters
+            tracker.log_params({
+                "model_type": "LinearRegression",
+                "preprocessing": preprocessing or "none",
+                "test_size": 0.2,
+                "random_state": 42,
+                "n_features": X.shape[1],
+                "n_samples": X.shape[0],
+            })
+            
+            # Log metrics
+            tracker.log_metrics({
+                "mse": mse,
+                "rmse": rmse,
+                "r2_score": r2,
+                "score": model.score(X_test, y_test),
+            })
+            
+            # Log additional info
+            tracker.set_tags({
+                "dataset": "synthetic_linear_data",
+                "algorithm": "sklearn.LinearRegression",
+            })
+            
+            # Log reference feature sketch for drift monitoring at serving time
+            reference = FeatureSketch.from_data(X_train.to_numpy(), feature_names=list(X.columns))
+            tracker.log_dict(reference.to_dict(), REFERENCE_ARTIFACT)
+            
+            # Log a held-out sample for the serving precision check
+            tracker.log_dict({"columns": list(X.columns), "data": X_test.iloc[:200].to_numpy().tolist()}, HOLDOUT_ARTIFACT)
+            
+            # Log model (synchronous: registration needs the upload to be complete)
+            print("Logging model to MLflow...")
+            mlflow.sklearn.log_model(
+                model, 
+                "model",
+                registered_model_name="LinearRegressionModel"
+            )
         
         print(f"✅ Model training completed!")
         print(f"📊 Metrics:")
@@ -95,6 +119,7 @@ def main():
         with open("model_path.txt", "w") as f:
             f.write(model_path)
         print(f"💾 Model path saved to model_path.txt: {model_path}")
+    return True
 
 if __name__ == "__main__":
     main()
\ No newline at end of file